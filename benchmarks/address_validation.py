@@ -0,0 +1,124 @@
+"""
+Time reading a synthetic CSV address file with validation in the importing
+process and spread over a pool of processes, using an SQLite database.
+
+Usage, from the repository root:
+
+    python benchmarks/address_validation.py [rows, default 200000]
+        [processes, default the amount of CPU's]
+"""
+from __future__ import print_function
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io import BytesIO
+
+# Share of rows with an invalid e-mail address
+INVALID = 0.05
+
+REPEAT = 3
+
+
+def setup(path):
+    from django.conf import settings
+
+    settings.configure(
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': path
+            }
+        },
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'django.contrib.sites',
+            'sorl.thumbnail',
+            'newsletter'
+        ],
+        MIDDLEWARE_CLASSES=(),
+        SITE_ID=1,
+        SECRET_KEY='benchmark',
+        USE_TZ=True
+    )
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', interactive=False, verbosity=0)
+
+
+def make_file(rows):
+    lines = ['name,email']
+    step = int(1 / INVALID)
+
+    for x in range(rows):
+        if x % step:
+            lines.append('Subscriber %d,Subscriber%d@Example.com' % (x, x))
+        else:
+            lines.append('Subscriber %d,subscriber%d' % (x, x))
+
+    return '\n'.join(lines) + '\n'
+
+
+def measure(newsletter, data, processes):
+    """ Return the best of `REPEAT` timings of parsing `data`, in s. """
+    from newsletter.admin_forms import parse_csv, AddressCollector
+
+    timings = []
+    for x in range(REPEAT):
+        start = time.time()
+
+        collector = AddressCollector(newsletter, True, processes=processes)
+        try:
+            parse_csv(BytesIO(data), newsletter, True, collector)
+        finally:
+            collector.close()
+
+        timings.append(time.time() - start)
+
+    return min(timings), collector.valid
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    if len(sys.argv) > 2:
+        processes = int(sys.argv[2])
+    else:
+        processes = multiprocessing.cpu_count()
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        setup(os.path.join(directory, 'benchmark.sqlite'))
+
+        from newsletter.models import Newsletter
+
+        newsletter = Newsletter.objects.create(
+            title='Newsletter', slug='newsletter',
+            sender='Sender', email='sender@example.com'
+        )
+        data = make_file(rows)
+
+        print('Reading %d rows, %d CPU\'s available' % (
+            rows, multiprocessing.cpu_count()
+        ))
+        print('%-12s %10s %12s %8s' % ('processes', 'time (s)', 'rows/s',
+                                       'valid'))
+
+        for count in sorted(set((1, processes))):
+            timing, valid = measure(newsletter, data, count)
+            print('%-12d %10.2f %12.0f %8d' % (
+                count, timing, rows / timing, valid
+            ))
+
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,92 @@
+"""
+Compare LDIFParser and FastLDIFParser on a generated directory export.
+
+Usage, from the repository root:
+
+    python benchmarks/ldif_parsers.py [size in megabytes, default 1024]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from newsletter.addressimport import ldif
+
+
+ENTRY = (
+    'dn: cn=Test User %(n)d,ou=people,dc=example,dc=com\n'
+    'objectClass: inetOrgPerson\n'
+    'cn: Test User %(n)d\n'
+    'sn: User\n'
+    'givenName: Test\n'
+    'mail: test%(n)d@example.com\n'
+    'telephoneNumber: +31 20 555 %(n)04d\n'
+    'description: A rather long description which is folded because it\n'
+    ' exceeds the maximum line length of an LDIF file.\n'
+    'jpegPhoto:: %(photo)s\n'
+    '\n'
+)
+
+PHOTO = 'QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVo=' * 20
+
+
+class Collector(object):
+    def __init__(self):
+        self.count = 0
+
+    def handle(self, dn, entry):
+        if 'mail' in entry:
+            self.count += 1
+
+
+def generate(path, size):
+    with open(path, 'wb') as f:
+        n = 0
+        while f.tell() < size:
+            f.write(''.join(
+                ENTRY % {'n': n + x, 'photo': PHOTO} for x in range(1000)
+            ))
+            n += 1000
+
+
+def run(parser_class, path, **kwargs):
+    collector = Collector()
+
+    class Parser(parser_class):
+        def handle(self, dn, entry):
+            collector.handle(dn, entry)
+
+    with open(path, 'rb') as f:
+        start = time.time()
+        Parser(f, **kwargs).parse()
+        duration = time.time() - start
+
+    return collector.count, duration
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+
+    fd, path = tempfile.mkstemp(suffix='.ldif')
+    os.close(fd)
+
+    try:
+        print('Generating %d MB of LDIF data...' % size)
+        generate(path, size * 1024 * 1024)
+
+        for name, parser_class, kwargs in (
+            ('LDIFParser', ldif.LDIFParser, {}),
+            ('FastLDIFParser', ldif.FastLDIFParser, {}),
+            ('FastLDIFParser (mail, cn)', ldif.FastLDIFParser,
+             {'attr_types': ('mail', 'cn')}),
+        ):
+            count, duration = run(parser_class, path, **kwargs)
+            print('%-28s %d entries in %.1fs (%.1f MB/s)' % (
+                name, count, duration, size / duration
+            ))
+    finally:
+        os.remove(path)
@@ -0,0 +1,183 @@
+"""
+Time subscription queries with and without the composite indexes on
+newsletter_subscription, using a synthetic SQLite database.
+
+Usage, from the repository root:
+
+    python benchmarks/subscription_indexes.py [rows, default 5000000]
+"""
+from __future__ import print_function
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+# Composite indexes of Subscription, by columns and whether they are unique
+INDEXES = (
+    (('newsletter_id', 'subscribed', 'unsubscribed', 'subscribe_date'), False),
+    (('email_normalized', 'newsletter_id'), True),
+)
+
+NEWSLETTERS = 10
+REPEAT = 5
+
+
+def setup(path):
+    from django.conf import settings
+
+    settings.configure(
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': path
+            }
+        },
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'django.contrib.sites',
+            'sorl.thumbnail',
+            'newsletter'
+        ],
+        MIDDLEWARE_CLASSES=(),
+        SITE_ID=1,
+        SECRET_KEY='benchmark',
+        USE_TZ=True
+    )
+
+    import django
+    django.setup()
+
+    # Create the table without the composite indexes
+    from newsletter.models import Subscription
+    Subscription._meta.unique_together = (
+        ('user', 'email_field', 'newsletter'),
+    )
+    Subscription._meta.index_together = ()
+
+    from django.core.management import call_command
+    call_command('migrate', interactive=False, verbosity=0)
+
+
+def fill(cursor, rows):
+    from newsletter.models import Newsletter
+
+    newsletters = [
+        Newsletter.objects.create(
+            title='Newsletter %d' % x, slug='newsletter-%d' % x,
+            sender='Sender', email='sender@example.com'
+        ).pk for x in range(NEWSLETTERS)
+    ]
+
+    start = datetime(2010, 1, 1)
+    chunk = 10000
+
+    for offset in range(0, rows, chunk):
+        values = []
+        for x in range(offset, min(offset + chunk, rows)):
+            email = 'subscriber%d@example.com' % x
+            state = random.random()
+            values.append((
+                random.choice(newsletters), email, email, 'Subscriber',
+                start + timedelta(minutes=x),
+                start + timedelta(minutes=x) if state < 0.8 else None,
+                state < 0.8, 0.8 <= state < 0.9, ''
+            ))
+
+        cursor.executemany(
+            'INSERT INTO newsletter_subscription (newsletter_id, email, '
+            'email_normalized, name, create_date, subscribe_date, '
+            'subscribed, unsubscribed, activation_code) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)', values
+        )
+
+    return newsletters[0]
+
+
+def measure(function):
+    """ Return the best of `REPEAT` timings of `function`, in ms. """
+    timings = []
+    for x in range(REPEAT):
+        start = time.time()
+        function()
+        timings.append(time.time() - start)
+
+    return min(timings) * 1000
+
+
+def run_queries(newsletter_id, rows):
+    from newsletter.models import Newsletter, Subscription
+
+    newsletter = Newsletter.objects.get(pk=newsletter_id)
+    email = 'subscriber%d@example.com' % (rows // 2)
+
+    def get_subscriptions():
+        list(newsletter.get_subscriptions().values_list('pk', flat=True))
+
+    def admin_filter():
+        # Changelist filtered on newsletter, status and year
+        changelist = Subscription.objects.filter(
+            newsletter=newsletter, subscribed=True, unsubscribed=False,
+            subscribe_date__year=2012
+        )
+        changelist.count()
+        list(changelist.order_by('-subscribe_date')[:100])
+
+    def email_lookup():
+        list(Subscription.objects.filter(
+            newsletter=newsletter, email_normalized=email
+        ))
+
+    return (
+        ('get_subscriptions()', measure(get_subscriptions)),
+        ('admin filter', measure(admin_filter)),
+        ('e-mail lookup', measure(email_lookup)),
+    )
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        setup(os.path.join(directory, 'benchmark.sqlite'))
+
+        from django.db import connection, transaction
+
+        cursor = connection.cursor()
+
+        print('Filling newsletter_subscription with %d rows...' % rows)
+        with transaction.atomic():
+            newsletter_id = fill(cursor, rows)
+        cursor.execute('ANALYZE')
+
+        without = run_queries(newsletter_id, rows)
+
+        start = time.time()
+        for columns, unique in INDEXES:
+            cursor.execute(
+                'CREATE %sINDEX benchmark_%s ON newsletter_subscription '
+                '(%s)' % (
+                    'UNIQUE ' if unique else '', '_'.join(columns),
+                    ', '.join(columns)
+                )
+            )
+        cursor.execute('ANALYZE')
+        print('Created indexes in %.1fs' % (time.time() - start))
+
+        with_indexes = run_queries(newsletter_id, rows)
+
+        print('%-22s %12s %12s' % ('', 'without (ms)', 'with (ms)'))
+        for (name, before), (name, after) in zip(without, with_indexes):
+            print('%-22s %12.1f %12.1f' % (name, before, after))
+
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,62 @@
+"""
+Bloom filter, a compact probabilistic set used to rule out e-mail
+addresses which are certainly not subscribed without querying the database.
+"""
+
+import math
+
+from hashlib import md5
+
+
+class BloomFilter(object):
+    """
+    Set-like object of strings allowing false positives at `error_rate`
+    but never false negatives, using about 10 bits per item for a 1% error
+    rate when `capacity` items are added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        assert 0 < error_rate < 1, 'Error rate should be between 0 and 1.'
+
+        capacity = max(capacity, 1)
+
+        self.size = int(math.ceil(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        ))
+        self.hashes = max(
+            int(round(float(self.size) / capacity * math.log(2))), 1
+        )
+
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        """ Bit positions for `value`, by double hashing a single digest. """
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+
+        digest = md5(value).hexdigest()
+        a = int(digest[:16], 16)
+        b = int(digest[16:], 16) | 1
+
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        for position in self._positions(value):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def __len__(self):
+        return self.count
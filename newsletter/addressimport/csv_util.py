@@ -39,6 +39,94 @@ class UnicodeReader:
         return self.reader.line_num
 
 
+# Amount of bytes used to detect the charset of a file
+CHARSET_SAMPLE_SIZE = 64 * 1024
+
+# Amount of bytes used to detect the dialect of a file
+DIALECT_SAMPLE_SIZE = 1024
+
+
+def detect_charset(f, sample_size=CHARSET_SAMPLE_SIZE):
+    """
+    Detect the charset of the file "f" from at most sample_size bytes,
+    after which the file is rewound.
+    """
+    from chardet.universaldetector import UniversalDetector
+
+    detector = UniversalDetector()
+
+    read = 0
+    while read < sample_size and not detector.done:
+        chunk = f.read(min(8192, sample_size - read))
+        if not chunk:
+            break
+
+        detector.feed(chunk)
+        read += len(chunk)
+
+    detector.close()
+    f.seek(0)
+
+    charset = detector.result['encoding']
+
+    # Non-ASCII characters might be beyond the sample
+    if not charset or charset.lower() == 'ascii':
+        charset = 'utf-8'
+
+    return charset
+
+
+def is_ascii_compatible(encoding):
+    """
+    Whether delimiters, quotes and line endings are encoded as in ASCII
+    in the given encoding, and never occur within other characters.
+    """
+    name = codecs.lookup(encoding).name.replace('-', '_')
+
+    return not name.startswith(
+        ('utf_16', 'utf_32', 'utf_7', 'iso2022', 'hz')
+    )
+
+
+class StreamingReader:
+    """
+    A CSV reader which will lazily iterate over lines in the CSV file "f",
+    which is encoded in the given encoding, decoding every cell once.
+
+    Files in ASCII compatible encodings are parsed as is, others are
+    recoded to UTF-8 line by line. Cells which cannot be decoded are read
+    as Latin-1.
+    """
+
+    def __init__(self, f, dialect=csv.excel, encoding="utf-8", **kwds):
+        if is_ascii_compatible(encoding):
+            self.encoding = encoding
+        else:
+            f = UTF8Recoder(f, encoding)
+            self.encoding = "utf-8"
+
+        self.reader = csv.reader(f, dialect=dialect, **kwds)
+
+    def decode(self, s):
+        try:
+            return s.decode(self.encoding)
+        except UnicodeDecodeError:
+            # The charset was detected from the start of the file only,
+            # fall back to an encoding which can decode anything.
+            return s.decode("latin-1")
+
+    def next(self):
+        row = self.reader.next()
+        return [self.decode(s) for s in row]
+
+    def __iter__(self):
+        return self
+
+    @property
+    def line_num(self):
+        return self.reader.line_num
+
+
 class UnicodeWriter:
     """
     A CSV writer which will write rows to CSV file "f",
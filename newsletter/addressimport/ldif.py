@@ -19,6 +19,7 @@ __all__ = [
     # classes
     'LDIFWriter',
     'LDIFParser',
+    'FastLDIFParser',
     'LDIFRecordList',
     'LDIFCopy',
 ]
@@ -429,6 +430,211 @@ class LDIFParser:
         return  # parse()
 
 
+class FastLDIFParser(LDIFParser):
+
+    """
+    LDIF parser reading its input in large blocks instead of line by line,
+    for large directory exports. Records are handed to handle() like
+    LDIFParser does.
+
+    Public class attributes:
+    records_read
+          Counter for records processed so far
+    """
+
+    def __init__(
+        self,
+        input_file,
+        ignored_attr_types=None,
+        max_entries=0,
+        process_url_schemes=None,
+        line_sep='\n',
+        attr_types=None,
+        validate_dn=None,
+        buffer_size=1024 * 1024
+    ):
+        """
+        See LDIFParser.__init__()
+
+        Additional Parameters:
+        attr_types
+            If given, only attributes with these attribute type names are
+            decoded and passed to handle(). Records without any of them
+            are still passed, with an empty entry.
+        validate_dn
+            Whether to check DN's to be valid, by default only when all
+            attributes are read.
+        buffer_size
+            Amount of bytes read at once
+        """
+        LDIFParser.__init__(
+            self, input_file, ignored_attr_types,
+            max_entries, process_url_schemes, line_sep
+        )
+        if attr_types is None:
+            self._attr_types = None
+        else:
+            self._attr_types = list_dict([a.lower() for a in attr_types])
+        if validate_dn is None:
+            validate_dn = attr_types is None
+        self._validate_dn = validate_dn
+        self._buffer_size = buffer_size
+
+    def _readLines(self):
+        """
+        Yield lists of lines without line separators, read in blocks
+        """
+        tail = ''
+        while True:
+            block = self._input_file.read(self._buffer_size)
+            if not block:
+                break
+            block = tail + block
+            if '\r' in block:
+                block = block.replace('\r\n', '\n')
+            lines = block.split('\n')
+            tail = lines.pop()
+            yield lines
+        if tail:
+            yield [tail]
+
+    def _resetRecord(self):
+        self._dn = None
+        self._changetype = None
+        self._entry = {}
+        self._has_attrs = False
+
+    def _endRecord(self):
+        """
+        Pass the current record to handle(), returns False when
+        max_entries has been reached
+        """
+        if self._entry or self._has_attrs:
+            self.handle(self._dn, self._entry)
+            self.records_read = self.records_read + 1
+        self._resetRecord()
+        return (
+            not self._max_entries or self.records_read < self._max_entries
+        )
+
+    def _decodeValue(self, line, colon_pos):
+        """
+        Return the value of an unfolded attribute line
+        """
+        value_spec = line[colon_pos + 1:colon_pos + 2]
+        if value_spec == ':':
+            return base64.decodestring(line[colon_pos + 2:])
+        elif value_spec == '<':
+            url = line[colon_pos + 2:].strip()
+            if self._process_url_schemes:
+                u = urlparse.urlparse(url)
+                if u[0] in self._process_url_schemes:
+                    return urllib.urlopen(url).read()
+            return None
+        else:
+            return line[colon_pos + 2:].lstrip()
+
+    def _parseLine(self, line):
+        """
+        Parse a single unfolded line, returns False when max_entries
+        has been reached
+        """
+        if not line:
+            return self._endRecord()
+        if line[0] == '#':
+            return True
+        colon_pos = line.find(':')
+        if colon_pos < 0:
+            # Treat malformed lines without colon as end of record
+            return self._endRecord()
+        attr_type = line[:colon_pos]
+
+        if attr_type == 'dn':
+            if self._dn is not None:
+                raise ValueError(
+                    "Two lines starting with dn: in one record."
+                )
+            dn = self._decodeValue(line, colon_pos)
+            if self._validate_dn and not is_dn(dn):
+                raise ValueError(
+                    "No valid string-representation of "
+                    "distinguished name %s." % (repr(dn))
+                )
+            self._dn = dn
+        elif attr_type == 'version' and self._dn is None:
+            pass
+        elif attr_type == 'changetype':
+            if self._dn is None:
+                raise ValueError(
+                    "Read changetype: before getting valid dn: line."
+                )
+            if self._changetype is not None:
+                raise ValueError(
+                    "Two lines starting with changetype: in one record."
+                )
+            changetype = self._decodeValue(line, colon_pos)
+            if not changetype in valid_changetype_dict:
+                raise ValueError("changetype value %s is invalid." % (
+                    repr(changetype))
+                )
+            self._changetype = changetype
+        else:
+            attr_type_lower = attr_type.lower()
+            if attr_type_lower in self._ignored_attr_types:
+                return True
+            self._has_attrs = True
+            if (
+                self._attr_types is not None and
+                not attr_type_lower in self._attr_types
+            ):
+                return True
+            attr_value = self._decodeValue(line, colon_pos)
+            if attr_value is None:
+                return True
+            if attr_type in self._entry:
+                self._entry[attr_type].append(attr_value)
+            else:
+                self._entry[attr_type] = [attr_value]
+        return True
+
+    def parse(self):
+        """
+        Continously read and parse LDIF records
+        """
+        self._resetRecord()
+        if self._max_entries and self.records_read >= self._max_entries:
+            return
+
+        parse_line = self._parseLine
+        current = None
+        folded = None
+
+        for lines in self._readLines():
+            for line in lines:
+                if current is not None:
+                    if line[:1] == ' ':
+                        # Unfold continued line
+                        if folded is None:
+                            folded = [current]
+                        folded.append(line[1:])
+                        continue
+                    if folded is not None:
+                        current = ''.join(folded)
+                        folded = None
+                    if not parse_line(current):
+                        return
+                current = line
+
+        if current is not None:
+            if folded is not None:
+                current = ''.join(folded)
+            if not parse_line(current):
+                return
+        self._endRecord()
+
+        return  # parse()
+
+
 class LDIFRecordList(LDIFParser):
 
     """
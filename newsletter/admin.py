@@ -1,12 +1,14 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import json
+
 from django.conf import settings
 from django.conf.urls import patterns, url
 
 from django.contrib import admin, messages
 
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, Http404
 
 from django.template import RequestContext
 
@@ -15,7 +17,7 @@ from django.shortcuts import render_to_response
 from django.utils.translation import ugettext, ungettext, ugettext_lazy as _
 from django.utils.formats import date_format
 
-from .models import Newsletter, Subscription
+from .models import Newsletter, Subscription, AddressImport
 
 from .admin_forms import ImportForm, ConfirmForm, SubscriptionAdminForm
 from .admin_utils import ExtendibleModelAdminMixin
@@ -28,10 +30,14 @@ ICON_URLS = {
     'no': '%sadmin/img/icon-no.gif' % settings.STATIC_URL
 }
 
+# Amount of staged addresses shown when confirming an import
+IMPORT_SAMPLE_SIZE = 10
+
 
 class NewsletterAdmin(admin.ModelAdmin):
     list_display = (
-        'title', 'admin_subscriptions', 'admin_messages', 'admin_submissions'
+        'title', 'subscribed_count', 'unsubscribed_count', 'pending_count',
+        'admin_subscriptions', 'admin_messages', 'admin_submissions'
     )
     prepopulated_fields = {'slug': ('title',)}
 
@@ -126,7 +132,9 @@ class SubscriptionAdmin(admin.ModelAdmin, ExtendibleModelAdminMixin):
 
     """ Actions """
     def make_subscribed(self, request, queryset):
-        rows_updated = queryset.update(subscribed=True)
+        rows_updated = Subscription.objects.bulk_transition(
+            queryset, 'subscribe'
+        )
         self.message_user(
             request,
             ungettext(
@@ -138,7 +146,9 @@ class SubscriptionAdmin(admin.ModelAdmin, ExtendibleModelAdminMixin):
     make_subscribed.short_description = _("Subscribe selected users")
 
     def make_unsubscribed(self, request, queryset):
-        rows_updated = queryset.update(subscribed=False)
+        rows_updated = Subscription.objects.bulk_transition(
+            queryset, 'unsubscribe'
+        )
         self.message_user(
             request,
             ungettext(
@@ -150,12 +160,24 @@ class SubscriptionAdmin(admin.ModelAdmin, ExtendibleModelAdminMixin):
     make_unsubscribed.short_description = _("Unsubscribe selected users")
 
     """ Views """
+    def _get_address_import(self, request):
+        """ Return the import in the session, or None. """
+        try:
+            return AddressImport.objects.get(
+                pk=request.session['address_import']
+            )
+        except (KeyError, AddressImport.DoesNotExist):
+            return None
+
     def subscribers_import(self, request):
         if request.POST:
             form = ImportForm(request.POST, request.FILES)
             if form.is_valid():
-                request.session['addresses'] = form.get_addresses()
-                return HttpResponseRedirect('confirm/')
+                # The file is parsed in the background
+                address_import = form.save()
+
+                request.session['address_import'] = address_import.pk
+                return HttpResponseRedirect('progress/')
         else:
             form = ImportForm()
 
@@ -165,35 +187,84 @@ class SubscriptionAdmin(admin.ModelAdmin, ExtendibleModelAdminMixin):
             RequestContext(request, {}),
         )
 
+    def subscribers_import_progress(self, request):
+        address_import = self._get_address_import(request)
+
+        # If no import is in the session, start all over.
+        if not address_import:
+            return HttpResponseRedirect('../')
+
+        if address_import.status == AddressImport.FINISHED:
+            return HttpResponseRedirect('../confirm/')
+
+        return render_to_response(
+            "admin/newsletter/subscription/importprogress.html",
+            {'address_import': address_import},
+            RequestContext(request, {}),
+        )
+
+    def subscribers_import_status(self, request):
+        """ Progress of the import in the session, as JSON for polling. """
+        address_import = self._get_address_import(request)
+
+        if not address_import:
+            raise Http404
+
+        return HttpResponse(
+            json.dumps(address_import.get_progress()),
+            content_type='application/json'
+        )
+
     def subscribers_import_confirm(self, request):
-        # If no addresses are in the session, start all over.
-        if not 'addresses' in request.session:
+        address_import = self._get_address_import(request)
+
+        # If no import is in the session, start all over.
+        if not address_import:
             return HttpResponseRedirect('../')
 
-        addresses = request.session['addresses']
-        logger.debug('Confirming addresses: %s', addresses)
+        # Only finished imports can be confirmed
+        if address_import.status != AddressImport.FINISHED:
+            return HttpResponseRedirect('../progress/')
+
+        logger.debug('Confirming import: %s', address_import)
         if request.POST:
             form = ConfirmForm(request.POST)
             if form.is_valid():
                 try:
-                    for address in addresses.values():
-                        address.save()
+                    summary = address_import.confirm()
                 finally:
-                    del request.session['addresses']
+                    del request.session['address_import']
 
                 messages.success(
                     request,
                     _('%s subscriptions have been successfully added.') %
-                    len(addresses)
+                    summary['inserted']
                 )
 
+                if summary['skipped'] or summary['conflicted']:
+                    messages.warning(
+                        request,
+                        _('%(skipped)d addresses were already subscribed '
+                          'to, %(conflicted)d addresses have unactivated or '
+                          'unsubscribed subscriptions and were left '
+                          'unchanged.') % summary
+                    )
+
                 return HttpResponseRedirect('../../')
         else:
             form = ConfirmForm()
 
+        count = address_import.valid
+        sample = address_import.addresses.order_by('pk')[:IMPORT_SAMPLE_SIZE]
+
         return render_to_response(
             "admin/newsletter/subscription/confirmimportform.html",
-            {'form': form, 'subscribers': addresses},
+            {
+                'form': form,
+                'count': count,
+                'subscribers': sample,
+                'remaining': max(count - IMPORT_SAMPLE_SIZE, 0)
+            },
             RequestContext(request, {}),
         )
 
@@ -206,6 +277,12 @@ class SubscriptionAdmin(admin.ModelAdmin, ExtendibleModelAdminMixin):
             url(r'^import/$',
                 self._wrap(self.subscribers_import),
                 name=self._view_name('import')),
+            url(r'^import/progress/$',
+                self._wrap(self.subscribers_import_progress),
+                name=self._view_name('import_progress')),
+            url(r'^import/status/$',
+                self._wrap(self.subscribers_import_status),
+                name=self._view_name('import_status')),
             url(r'^import/confirm/$',
                 self._wrap(self.subscribers_import_confirm),
                 name=self._view_name('import_confirm')),
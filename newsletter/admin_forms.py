@@ -1,3 +1,4 @@
+import collections
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,27 +9,48 @@ from django.core.exceptions import ValidationError
 
 from django.core.validators import validate_email
 
+from django.db import connection
+
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import ugettext
 
 from django.conf import settings
 
-from .models import Subscription, Newsletter
+from .addressimport.bloom import BloomFilter
+from .models import Subscription, Newsletter, AddressImport
+from .settings import newsletter_settings
+from .utils import normalize_email
 
 
-def make_subscription(newsletter, email, name=None):
+def get_subscribed_filter(newsletter):
+    """
+    Return a Bloom filter of the e-mail addresses subscribed to
+    `newsletter`, so that during imports only addresses hitting the filter
+    have to be checked against the database.
+    """
     qs = Subscription.objects.filter(
         newsletter__id=newsletter.id,
         subscribed=True,
-        email_field__exact=email)
+        email_normalized__isnull=False
+    ).values_list('email_normalized', flat=True)
+
+    subscribed = BloomFilter(qs.count())
+    subscribed.update(qs.iterator())
+
+    logger.debug(
+        'Built filter of %d subscribed addresses for %s.',
+        len(subscribed), newsletter
+    )
 
-    if qs.count():
-        return None
+    return subscribed
 
+
+def _new_subscription(newsletter, email, email_normalized, name=None):
     addr = Subscription(subscribed=True)
     addr.newsletter = newsletter
 
     addr.email_field = email
+    addr.email_normalized = email_normalized
 
     if name:
         addr.name_field = name
@@ -36,12 +58,401 @@ def make_subscription(newsletter, email, name=None):
     return addr
 
 
+def make_subscription(newsletter, email, name=None, subscribed=None):
+    """
+    Return a new, unsaved subscription of `email` to `newsletter` or None
+    when `email` has already been subscribed to. When given, `subscribed`
+    is a filter (see `get_subscribed_filter()`) of subscribed addresses
+    which are certainly not subscribed when missing from it.
+    """
+    email_normalized = normalize_email(email)
+
+    if subscribed is None or email_normalized in subscribed:
+        qs = Subscription.objects.filter(
+            newsletter__id=newsletter.id,
+            subscribed=True,
+            email_normalized=email_normalized)
+
+        if qs.count():
+            return None
+
+    return _new_subscription(newsletter, email, email_normalized, name)
+
+
+# Classification of entries by make_subscriptions()
+NEW = 'new'
+EXISTING = 'existing'
+DUPLICATE = 'duplicate'
+
+
+def make_subscriptions(newsletter, entries, subscribed=None):
+    """
+    Batched `make_subscription()` for a chunk of (email, name) pairs,
+    resolving already subscribed addresses with a single query.
+
+    Returns a (status, subscription) tuple for every entry, in order.
+    Status is NEW, EXISTING when already subscribed to (subscription being
+    None) or DUPLICATE when repeating an earlier entry of the chunk.
+    """
+    return resolve_subscriptions(newsletter, [
+        (email, normalize_email(email), name) for email, name in entries
+    ], subscribed)
+
+
+def resolve_subscriptions(newsletter, entries, subscribed=None):
+    """
+    `make_subscriptions()` for (email, email_normalized, name) tuples of
+    which the e-mail address has already been normalized.
+    """
+    candidates = set(
+        email_normalized for email, email_normalized, name in entries
+        if subscribed is None or email_normalized in subscribed
+    )
+
+    if candidates:
+        existing = set(Subscription.objects.filter(
+            newsletter__id=newsletter.id,
+            subscribed=True,
+            email_normalized__in=candidates
+        ).values_list('email_normalized', flat=True))
+    else:
+        existing = set()
+
+    results = []
+    seen = set()
+    for email, email_normalized, name in entries:
+        if email_normalized in existing:
+            results.append((EXISTING, None))
+            continue
+
+        if email_normalized in seen:
+            status = DUPLICATE
+        else:
+            status = NEW
+            seen.add(email_normalized)
+
+        results.append((status, _new_subscription(
+            newsletter, email, email_normalized, name
+        )))
+
+    return results
+
+
+# Errors found by validate_entries()
+NAME_TOO_LONG = 'name_too_long'
+EMAIL_TOO_LONG = 'email_too_long'
+INVALID_EMAIL = 'invalid_email'
+
+_field_limits = None
+
+
+def get_field_limits():
+    """ Return the maximum lengths of names and e-mail addresses. """
+    global _field_limits
+
+    if _field_limits is None:
+        _field_limits = dict(
+            (field, Subscription._meta.get_field_by_name(field)[0].max_length)
+            for field in ('name_field', 'email_field')
+        )
+
+    return _field_limits
+
+
+def validate_entries(entries, ignore_errors=False, limits=None):
+    """
+    Validate and normalize a chunk of (email, name) pairs, truncating too
+    long values when ignoring errors. Returns an (email, email_normalized,
+    name, error) tuple for every entry, in order, error being None or one
+    of NAME_TOO_LONG, EMAIL_TOO_LONG and INVALID_EMAIL. Invalid e-mail
+    addresses are not normalized.
+
+    As this might run in another process, no database access is allowed.
+    """
+    if limits is None:
+        limits = get_field_limits()
+
+    name_length = limits['name_field']
+    email_length = limits['email_field']
+
+    results = []
+    for email, name in entries:
+        error = None
+
+        if name and len(name) > name_length:
+            if ignore_errors:
+                name = name[:name_length]
+            else:
+                error = NAME_TOO_LONG
+
+        if error is None and len(email) > email_length:
+            if ignore_errors:
+                email = email[:email_length]
+            else:
+                error = EMAIL_TOO_LONG
+
+        email_normalized = None
+        if error is None:
+            try:
+                validate_email(email)
+            except ValidationError:
+                error = INVALID_EMAIL
+            else:
+                email_normalized = normalize_email(email)
+
+        results.append((email, email_normalized, name, error))
+
+    return results
+
+
+class AddressCollector(object):
+    """
+    Collects entries from an address file, validating them in chunks of
+    `NEWSLETTER_IMPORT_CHUNK_SIZE` and resolving already subscribed
+    addresses with `resolve_subscriptions()` in batches of
+    `NEWSLETTER_BULK_BATCH_SIZE`.
+
+    With `NEWSLETTER_IMPORT_PROCESSES` > 1, chunks are validated by a pool
+    of processes while the file is being read and earlier chunks are being
+    resolved, keeping up to `AHEAD` chunks per process in progress. The
+    pool is not used within transactions, as the database connection is
+    closed before forking.
+
+    New subscriptions end up in `addresses`, keyed by normalized e-mail
+    address or, when given, are staged in `address_import` while keeping
+    track of its progress. Of duplicate entries, the first one is kept.
+    """
+
+    AHEAD = 4
+
+    def __init__(self, newsletter, ignore_errors=False, batch_size=None,
+                 address_import=None, processes=None, chunk_size=None):
+        self.newsletter = newsletter
+        self.ignore_errors = ignore_errors
+        self.batch_size = batch_size or newsletter_settings.BULK_BATCH_SIZE
+        self.chunk_size = chunk_size or newsletter_settings.IMPORT_CHUNK_SIZE
+        self.address_import = address_import
+
+        if processes is None:
+            processes = newsletter_settings.IMPORT_PROCESSES
+        self.processes = processes
+        self.pool = None
+
+        self.limits = get_field_limits()
+        self.subscribed = get_subscribed_filter(newsletter)
+        self.addresses = {}
+        self.seen = set()
+
+        # Entries read but not submitted for validation yet
+        self.pending = []
+        # Chunks being validated, as (rows, result) tuples, in order
+        self.running = collections.deque()
+        # Valid entries which have not been resolved yet
+        self.validated = []
+
+        # Progress
+        self.rows_read = 0
+        self.valid = 0
+        self.duplicates = 0
+        self.errors = 0
+
+    def add(self, email, name=None, row=None):
+        """
+        Add an entry, `row` being its line (CSV) or entry (vCard, LDIF)
+        number for error reports.
+        """
+        self.rows_read += 1
+        self.pending.append((email, name, row))
+
+        if len(self.pending) >= self.chunk_size:
+            self.submit()
+
+    def skip(self):
+        """ Count an entry skipped because of errors. """
+        self.rows_read += 1
+        self.errors += 1
+
+    def submit(self):
+        """ Validate pending entries, in the background when configured. """
+        pending, self.pending = self.pending, []
+
+        if not pending:
+            return
+
+        entries = [(email, name) for email, name, row in pending]
+        rows = [row for email, name, row in pending]
+
+        if self.processes <= 1 or not self.start_pool():
+            self.receive(rows, validate_entries(
+                entries, self.ignore_errors, self.limits
+            ))
+            return
+
+        self.running.append((rows, self.pool.apply_async(
+            validate_entries, (entries, self.ignore_errors, self.limits)
+        )))
+
+        # Limit the amount of validated entries waiting in memory
+        while len(self.running) > self.processes * self.AHEAD:
+            self.collect()
+
+    def start_pool(self):
+        """
+        Start the validation processes, if not running yet. Returns False
+        when these cannot be started, within a transaction.
+        """
+        if self.pool is None:
+            if getattr(connection, 'in_atomic_block', False):
+                logger.debug(
+                    'Validating in process, as a transaction is running.'
+                )
+                return False
+
+            import multiprocessing
+
+            # Forked processes would share the socket of the database
+            # connection otherwise; it is reopened when next used.
+            connection.close()
+
+            self.pool = multiprocessing.Pool(self.processes)
+
+        return True
+
+    def collect(self):
+        """ Wait for the oldest chunk being validated. """
+        rows, result = self.running.popleft()
+        self.receive(rows, result.get())
+
+    def receive(self, rows, validated):
+        """ Handle a validated chunk, resolving full batches. """
+        for (email, email_normalized, name, error), row in zip(
+                validated, rows):
+            if error:
+                self.invalid(email, name, row, error)
+            else:
+                self.validated.append((email, email_normalized, name, row))
+
+        while len(self.validated) >= self.batch_size:
+            self.resolve()
+
+    def close(self):
+        """ Stop validation processes, if any. """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+        self.running.clear()
+
+    def invalid(self, email, name, row, error):
+        """ Report or, when ignoring errors, skip an invalid entry. """
+        logger.warn(
+            "Entry '%s' at row %s with e-mail '%s' is invalid: %s",
+            name, row, email, error
+        )
+
+        if error == NAME_TOO_LONG:
+            check_name(name)
+        elif error == EMAIL_TOO_LONG:
+            check_email(email)
+        elif not self.ignore_errors:
+            raise forms.ValidationError(_(
+                "Entry '%s' does not contain a valid "
+                "e-mail address.") % name
+            )
+
+        self.errors += 1
+
+    def resolve(self):
+        """ Resolve a batch of validated entries. """
+        entries = self.validated[:self.batch_size]
+        del self.validated[:self.batch_size]
+
+        results = resolve_subscriptions(
+            self.newsletter,
+            [(email, email_normalized, name)
+             for email, email_normalized, name, row in entries],
+            self.subscribed
+        )
+
+        new = []
+        for (email, email_normalized, name, row), (status, addr) in zip(
+                entries, results):
+            if status == EXISTING:
+                logger.warn(
+                    "Entry '%s' at row %s is already subscribed to "
+                    "with email '%s'", name, row, email
+                )
+
+                if not self.ignore_errors:
+                    raise forms.ValidationError(
+                        _("Some entries are already subscribed to."))
+
+                self.duplicates += 1
+                continue
+
+            if addr.email_normalized in self.seen:
+                logger.warn(
+                    "Entry '%s' at row %s contains a "
+                    "duplicate entry for '%s'", name, row, email
+                )
+
+                if not self.ignore_errors:
+                    raise forms.ValidationError(_(
+                        "The address file contains duplicate entries "
+                        "for '%s'.") % email)
+
+                self.duplicates += 1
+                continue
+
+            self.seen.add(addr.email_normalized)
+            new.append(addr)
+
+        self.valid += len(new)
+
+        if self.address_import is None:
+            for addr in new:
+                self.addresses[addr.email_normalized] = addr
+
+        else:
+            self.address_import.stage(new)
+            self.save_progress()
+
+    def save_progress(self):
+        """ Save progress of the address import, if any. """
+        if self.address_import is not None:
+            self.address_import.update_progress(
+                rows_read=self.rows_read, valid=self.valid,
+                duplicates=self.duplicates, errors=self.errors
+            )
+
+    def flush(self):
+        """ Validate and resolve all entries read so far. """
+        self.submit()
+
+        while self.running:
+            self.collect()
+
+        while self.validated:
+            self.resolve()
+
+    def finish(self):
+        """
+        Resolve remaining entries and stop validation processes. Progress
+        is saved, as the last entries might not have been resolved (i.e.
+        errors).
+        """
+        try:
+            self.flush()
+            self.save_progress()
+        finally:
+            self.close()
+
+
 def check_email(email, ignore_errors=False):
     if settings.DEBUG:
         logger.debug("Checking e-mail address %s", email)
 
-    email_length = \
-        Subscription._meta.get_field_by_name('email_field')[0].max_length
+    email_length = get_field_limits()['email_field']
 
     if len(email) <= email_length or ignore_errors:
         return email[:email_length]
@@ -61,8 +472,7 @@ def check_name(name, ignore_errors=False):
     if settings.DEBUG:
         logger.debug("Checking name: %s", name)
 
-    name_length = \
-        Subscription._meta.get_field_by_name('name_field')[0].max_length
+    name_length = get_field_limits()['name_field']
     if len(name) <= name_length or ignore_errors:
         return name[:name_length]
     else:
@@ -77,30 +487,21 @@ def check_name(name, ignore_errors=False):
         )
 
 
-def parse_csv(myfile, newsletter, ignore_errors=False):
-    from newsletter.addressimport.csv_util import UnicodeReader
-    import codecs
+def parse_csv(myfile, newsletter, ignore_errors=False, collector=None):
+    from newsletter.addressimport.csv_util import (
+        StreamingReader, detect_charset, is_ascii_compatible,
+        DIALECT_SAMPLE_SIZE
+    )
     import csv
 
-    # Detect encoding
-    from chardet.universaldetector import UniversalDetector
-
-    detector = UniversalDetector()
-
-    for line in myfile.readlines():
-        detector.feed(line)
-        if detector.done:
-            break
-
-    detector.close()
-    charset = detector.result['encoding']
-
-    # Reset the file index
-    myfile.seek(0)
+    # Detect encoding from the start of the file
+    charset = detect_charset(myfile)
 
     # Attempt to detect the dialect
-    encodedfile = codecs.EncodedFile(myfile, charset)
-    dialect = csv.Sniffer().sniff(encodedfile.read(1024))
+    sample = myfile.read(DIALECT_SAMPLE_SIZE)
+    if not is_ascii_compatible(charset):
+        sample = sample.decode(charset, 'ignore').encode('utf-8')
+    dialect = csv.Sniffer().sniff(sample)
 
     # Reset the file index
     myfile.seek(0)
@@ -108,7 +509,8 @@ def parse_csv(myfile, newsletter, ignore_errors=False):
     logger.info('Detected encoding %s and dialect %s for CSV file',
                 charset, dialect)
 
-    myreader = UnicodeReader(myfile, dialect=dialect, encoding=charset)
+    # Rows are read lazily, so memory use does not depend on the file size
+    myreader = StreamingReader(myfile, dialect=dialect, encoding=charset)
 
     firstrow = myreader.next()
 
@@ -172,7 +574,9 @@ def parse_csv(myfile, newsletter, ignore_errors=False):
 
     logger.debug('Extracting data.')
 
-    addresses = {}
+    if collector is None:
+        collector = AddressCollector(newsletter, ignore_errors)
+
     for row in myreader:
         if not max(namecol, mailcol) < len(row):
             logger.warn("Column count does not match for row number %d",
@@ -180,6 +584,7 @@ def parse_csv(myfile, newsletter, ignore_errors=False):
 
             if ignore_errors:
                 # Skip this record
+                collector.skip()
                 continue
             else:
                 raise forms.ValidationError(_(
@@ -187,54 +592,14 @@ def parse_csv(myfile, newsletter, ignore_errors=False):
                     "email field.") % {'row': row}
                 )
 
-        name = check_name(row[namecol], ignore_errors)
-        email = check_email(row[mailcol], ignore_errors)
-
-        logger.debug("Going to add %s <%s>", name, email)
-
-        try:
-            validate_email(email)
-            addr = make_subscription(newsletter, email, name)
-        except ValidationError:
-            if ignore_errors:
-                logger.warn(
-                    "Entry '%s' at line %d does not contain a valid "
-                    "e-mail address.",
-                    name, myreader.line_num, extra=dict(data={'row': row}))
-            else:
-                raise forms.ValidationError(_(
-                    "Entry '%s' does not contain a valid "
-                    "e-mail address.") % name
-                )
-
-        if addr:
-            if email in addresses:
-                logger.warn(
-                    "Entry '%s' at line %d contains a "
-                    "duplicate entry for '%s'",
-                    name, myreader.line_num, email,
-                    extra=dict(data={'row': row}))
-
-                if not ignore_errors:
-                    raise forms.ValidationError(_(
-                        "The address file contains duplicate entries "
-                        "for '%s'.") % email)
-
-            addresses.update({email: addr})
-        else:
-            logger.warn(
-                "Entry '%s' at line %d is already subscribed to "
-                "with email '%s'",
-                name, myreader.line_num, email, extra=dict(data={'row': row}))
+        collector.add(row[mailcol], row[namecol], myreader.line_num)
 
-            if not ignore_errors:
-                raise forms.ValidationError(
-                    _("Some entries are already subscribed to."))
+    collector.finish()
 
-    return addresses
+    return collector.addresses
 
 
-def parse_vcard(myfile, newsletter, ignore_errors=False):
+def parse_vcard(myfile, newsletter, ignore_errors=False, collector=None):
     import vobject
 
     try:
@@ -244,11 +609,12 @@ def parse_vcard(myfile, newsletter, ignore_errors=False):
             _(u"Error reading vCard file: %s" % e)
         )
 
-    addresses = {}
+    if collector is None:
+        collector = AddressCollector(newsletter, ignore_errors)
 
-    for myvcard in myvcards:
+    for number, myvcard in enumerate(myvcards, 1):
         if hasattr(myvcard, 'fn'):
-            name = check_name(myvcard.fn.value, ignore_errors)
+            name = myvcard.fn.value
         else:
             name = None
 
@@ -256,88 +622,140 @@ def parse_vcard(myfile, newsletter, ignore_errors=False):
         # If not: either continue to the next vcard or
         # raise a validation error.
         if hasattr(myvcard, 'email'):
-            email = check_email(myvcard.email.value, ignore_errors)
+            collector.add(myvcard.email.value, name, number)
         elif not ignore_errors:
             raise forms.ValidationError(
                 _("Entry '%s' contains no email address.") % name)
         else:
-            continue
+            collector.skip()
 
-        try:
-            validate_email(email)
-            addr = make_subscription(newsletter, email, name)
-        except ValidationError:
-            if not ignore_errors:
-                raise forms.ValidationError(
-                    _("Entry '%s' does not contain a valid e-mail address.")
-                    % name
-                )
+    collector.finish()
 
-        if addr:
-            if email in addresses and not ignore_errors:
-                raise forms.ValidationError(
-                    _("The address file contains duplicate entries for '%s'.")
-                    % email
-                )
-
-            addresses.update({email: addr})
-        elif not ignore_errors:
-            raise forms.ValidationError(
-                _("Some entries are already subscribed to."))
+    return collector.addresses
 
-    return addresses
 
-
-def parse_ldif(myfile, newsletter, ignore_errors=False):
+def parse_ldif(myfile, newsletter, ignore_errors=False, collector=None):
     from addressimport import ldif
 
-    class AddressParser(ldif.LDIFParser):
-        addresses = {}
+    if collector is None:
+        collector = AddressCollector(newsletter, ignore_errors)
 
+    class AddressParser(ldif.FastLDIFParser):
         def handle(self, dn, entry):
             if 'mail' in entry:
-                email = check_email(entry['mail'][0], ignore_errors)
                 if 'cn' in entry:
-                    name = check_name(entry['cn'][0], ignore_errors)
+                    name = entry['cn'][0]
                 else:
                     name = None
 
-                try:
-                    validate_email(email)
-                    addr = make_subscription(newsletter, email, name)
-                except ValidationError:
-                    if not ignore_errors:
-                        raise forms.ValidationError(_(
-                            "Entry '%s' does not contain a valid "
-                            "e-mail address.") % name
-                        )
-
-                if addr:
-                    if email in self.addresses and not ignore_errors:
-                        raise forms.ValidationError(_(
-                            "The address file contains duplicate entries "
-                            "for '%s'.") % email
-                        )
-
-                    self.addresses.update({email: addr})
-                elif not ignore_errors:
-                    raise forms.ValidationError(
-                        _("Some entries are already subscribed to."))
+                collector.add(
+                    entry['mail'][0], name, self.records_read + 1
+                )
 
             elif not ignore_errors:
                 raise forms.ValidationError(
                     _("Some entries have no e-mail address."))
+
+            else:
+                collector.skip()
+
     try:
-        myparser = AddressParser(myfile)
+        myparser = AddressParser(myfile, attr_types=('mail', 'cn'))
         myparser.parse()
     except ValueError, e:
         if not ignore_errors:
             raise forms.ValidationError(e)
 
-    return myparser.addresses
+    collector.finish()
+
+    return collector.addresses
+
+
+# Parsers by (lowercase) file extension
+PARSERS = {
+    'vcf': parse_vcard,
+    'ldif': parse_ldif,
+    'csv': parse_csv
+}
+
+
+def get_extension(filename):
+    return filename.rsplit('.', 1)[-1].lower()
+
+
+def process_import(address_import):
+    """
+    Parse and validate the file of a claimed `address_import`, staging
+    its addresses and keeping track of progress and status.
+    """
+    newsletter = address_import.newsletter
+    ignore_errors = address_import.ignore_errors
+
+    logger.info('Processing %s', address_import)
+
+    collector = AddressCollector(
+        newsletter, ignore_errors, address_import=address_import
+    )
+    parser = PARSERS[get_extension(address_import.address_file.name)]
+
+    try:
+        address_import.address_file.open('rb')
+        try:
+            parser(
+                address_import.address_file, newsletter, ignore_errors,
+                collector
+            )
+        finally:
+            address_import.address_file.close()
+            collector.close()
+
+        if not collector.valid:
+            raise forms.ValidationError(
+                _("No entries could found in this file."))
+
+    except forms.ValidationError as e:
+        address_import.addresses.all().delete()
+
+        address_import.finish(
+            address_import.FAILED, u' '.join(e.messages)
+        )
+
+    except Exception:
+        logger.exception('Error processing %s', address_import)
+
+        address_import.addresses.all().delete()
+
+        address_import.finish(address_import.FAILED, ugettext(
+            "An unexpected error occurred while reading the file."))
+
+    else:
+        if not address_import.finish(address_import.FINISHED):
+            # Failed for having been interrupted meanwhile
+            address_import.addresses.all().delete()
+
+
+def process_imports():
+    """
+    Process all pending address imports, after failing those of which
+    reading was interrupted.
+    """
+    AddressImport.fail_interrupted()
+
+    pending = AddressImport.objects.filter(
+        status=AddressImport.PENDING
+    ).select_related('newsletter').order_by('pk')
+
+    for address_import in pending:
+        # Skip imports claimed by concurrently running workers
+        if address_import.claim():
+            process_import(address_import)
 
 
 class ImportForm(forms.Form):
+    """
+    Upload of an address file, which is parsed in the background by
+    `process_imports()`.
+    """
 
     def clean(self):
         # If there are validation errors earlier on, don't bother.
@@ -348,12 +766,7 @@ class ImportForm(forms.Form):
             # TESTME: Should an error be raised here or not?
             #raise forms.ValidationError(_("No file has been specified."))
 
-        ignore_errors = self.cleaned_data['ignore_errors']
-        newsletter = self.cleaned_data['newsletter']
-
-        myfield = self.base_fields['address_file']
-        myvalue = myfield.widget.value_from_datadict(
-            self.data, self.files, self.add_prefix('address_file'))
+        myvalue = self.cleaned_data['address_file']
 
         content_type = myvalue.content_type
         allowed_types = ('text/plain', 'application/octet-stream',
@@ -366,37 +779,20 @@ class ImportForm(forms.Form):
             raise forms.ValidationError(_(
                 "File type '%s' was not recognized.") % content_type)
 
-        self.addresses = []
-
-        ext = myvalue.name.rsplit('.', 1)[-1].lower()
-        if ext == 'vcf':
-            self.addresses = parse_vcard(
-                myvalue.file, newsletter, ignore_errors)
-
-        elif ext == 'ldif':
-            self.addresses = parse_ldif(
-                myvalue.file, newsletter, ignore_errors)
-
-        elif ext == 'csv':
-            self.addresses = parse_csv(
-                myvalue.file, newsletter, ignore_errors)
-
-        else:
+        ext = get_extension(myvalue.name)
+        if ext not in PARSERS:
             raise forms.ValidationError(
                 _("File extention '%s' was not recognized.") % ext)
 
-        if len(self.addresses) == 0:
-            raise forms.ValidationError(
-                _("No entries could found in this file."))
-
         return self.cleaned_data
 
-    def get_addresses(self):
-        if hasattr(self, 'addresses'):
-            logger.debug('Getting addresses: %s', self.addresses)
-            return self.addresses
-        else:
-            return {}
+    def save(self):
+        """ Create a pending import for the uploaded file. """
+        return AddressImport.objects.create(
+            newsletter=self.cleaned_data['newsletter'],
+            address_file=self.cleaned_data['address_file'],
+            ignore_errors=self.cleaned_data['ignore_errors']
+        )
 
     newsletter = forms.ModelChoiceField(
         label=_("Newsletter"),
@@ -452,4 +848,23 @@ class SubscriptionAdminForm(forms.ModelForm):
                 'Either a user must be selected or an email address must '
                 'be specified.')
             )
+
+        # The unique normalized e-mail address is not editable, hence not
+        # validated by the model form.
+        email = cleaned_data.get('email_field', None)
+        newsletter = cleaned_data.get('newsletter', None)
+        if email and newsletter:
+            try:
+                existing = Subscription.objects.get_by_email(
+                    newsletter, email
+                )
+            except Subscription.DoesNotExist:
+                pass
+            else:
+                if existing.pk != self.instance.pk:
+                    raise forms.ValidationError(_(
+                        'A subscription with this email address already '
+                        'exists for this newsletter.')
+                    )
+
         return cleaned_data
@@ -0,0 +1,144 @@
+"""
+Optional cache of the lookups done by subscription forms: the state of
+the subscription of an e-mail address to a newsletter and whether an
+e-mail address belongs to a registered user.
+
+Enabled by setting `NEWSLETTER_STATUS_CACHE` to the alias of a cache
+configured in Django's `CACHES`. Entries are invalidated through model
+signals (see `newsletter.models`).
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+from hashlib import md5
+
+from .settings import newsletter_settings
+from .utils import normalize_email
+
+# Cached subscription state
+SUBSCRIBED = 'subscribed'
+
+
+def get_cache():
+    """ Return the configured cache, or None when caching is disabled. """
+    alias = newsletter_settings.STATUS_CACHE
+
+    if not alias:
+        return None
+
+    try:
+        from django.core.cache import caches
+    except ImportError:
+        # Django < 1.7
+        from django.core.cache import get_cache as get_cache_alias
+        return get_cache_alias(alias)
+
+    return caches[alias]
+
+
+def _make_key(*parts):
+    # Hash, as e-mail addresses might contain characters or be of a length
+    # not supported by all cache backends.
+    value = u':'.join(u'%s' % part for part in parts)
+
+    return 'newsletter:status:%s' % md5(value.encode('utf-8')).hexdigest()
+
+
+def _subscription_key(newsletter_id, email):
+    return _make_key('subscription', newsletter_id, normalize_email(email))
+
+
+def _user_key(email):
+    return _make_key('user', email)
+
+
+def get_subscription_state(newsletter_id, email):
+    """
+    Return SUBSCRIBED when `email` is known to be subscribed to the
+    newsletter, or None if this is not known.
+    """
+    cache = get_cache()
+
+    if cache is None:
+        return None
+
+    return cache.get(_subscription_key(newsletter_id, email))
+
+
+def set_subscription_state(newsletter_id, email, subscription):
+    """
+    Cache the state of `subscription`, if it is subscribed.
+
+    Other states are not cached: a subscription created between looking
+    it up and caching would be invalidated before the cache is set, after
+    which the stale state would make forms skip checking the database.
+    """
+    cache = get_cache()
+
+    if cache is None:
+        return
+
+    if subscription is None or not subscription.subscribed or \
+            subscription.unsubscribed:
+        return
+
+    cache.set(
+        _subscription_key(newsletter_id, email), SUBSCRIBED,
+        newsletter_settings.STATUS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_subscriptions(pairs):
+    """
+    Forget cached states for an iterable of (newsletter id, e-mail) pairs.
+    """
+    cache = get_cache()
+
+    if cache is None:
+        return
+
+    cache.delete_many([
+        _subscription_key(newsletter_id, email)
+        for newsletter_id, email in pairs if email
+    ])
+
+
+def get_registered_user(email):
+    """
+    Return the cached username of the user with `email`, or None if this
+    is not known.
+    """
+    cache = get_cache()
+
+    if cache is None:
+        return None
+
+    return cache.get(_user_key(email))
+
+
+def set_registered_user(email, username):
+    """
+    Cache `username` for `email`.
+
+    Empty usernames (no such user) are not cached, for the same reason as
+    states other than subscribed are not (see `set_subscription_state()`).
+    """
+    cache = get_cache()
+
+    if cache is None or not username:
+        return
+
+    cache.set(
+        _user_key(email), username, newsletter_settings.STATUS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_registered_user(email):
+    """ Forget whether `email` belongs to a registered user. """
+    cache = get_cache()
+
+    if cache is None or not email:
+        return
+
+    cache.delete(_user_key(email))
@@ -0,0 +1,249 @@
+""" Pooled, persistent connections to the e-mail backend. """
+
+import logging
+logger = logging.getLogger(__name__)
+
+import socket
+import threading
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from smtplib import (
+    SMTPException, SMTPServerDisconnected, SMTPConnectError,
+    SMTPRecipientsRefused, SMTPSenderRefused, SMTPDataError
+)
+
+from django.core.mail import get_connection
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from .settings import newsletter_settings
+
+# Errors after which a connection is considered broken
+CONNECTION_ERRORS = (SMTPServerDisconnected, SMTPConnectError, socket.error)
+
+# Errors rejecting a single message, after which the connection is still
+# usable (smtplib resets the session before raising these)
+MESSAGE_ERRORS = (SMTPRecipientsRefused, SMTPSenderRefused, SMTPDataError)
+
+
+class ConnectionPoolTimeout(socket.timeout):
+    """ No pooled connection became available in time. """
+
+
+class PooledConnection(object):
+    """
+    Wrapper around an e-mail backend connection keeping track of the
+    amount of messages sent over it, so it can be recycled.
+    """
+
+    def __init__(self, backend=None):
+        self.connection = get_connection(backend)
+        self.sent = 0
+        self.is_open = False
+
+    def open(self):
+        self.connection.open()
+        self.is_open = True
+
+    def close(self):
+        try:
+            self.connection.close()
+        except (SMTPException, socket.error):
+            # The connection might already have been dropped on the other
+            # side, which is fine as we are closing it anyway.
+            logger.debug('Error while closing connection.', exc_info=True)
+
+        self.is_open = False
+        self.sent = 0
+
+    def send_messages(self, messages):
+        if not self.is_open:
+            self.open()
+
+        sent = self.connection.send_messages(messages) or 0
+        self.sent += sent
+
+        return sent
+
+
+class ConnectionPool(object):
+    """
+    Pool of long-lived e-mail backend connections, so that a sequence of
+    messages does not require a full (TLS) handshake and authentication
+    for every single message.
+
+    Connections are recycled after `max_messages` messages and discarded
+    on errors. After connection errors, sending is retried on a fresh
+    connection up to `retries` times. Messages rejected by the server are
+    not retried and keep the connection in the pool. Waiting for a
+    connection times out after `timeout` seconds.
+    """
+
+    def __init__(self, size=None, max_messages=None, retries=None,
+                 backend=None, timeout=None):
+        if size is None:
+            size = newsletter_settings.CONNECTION_POOL_SIZE
+        if max_messages is None:
+            max_messages = newsletter_settings.CONNECTION_MAX_MESSAGES
+        if retries is None:
+            retries = newsletter_settings.CONNECTION_RETRIES
+        if timeout is None:
+            timeout = newsletter_settings.CONNECTION_POOL_TIMEOUT
+
+        assert size > 0, 'Pool size should be at least 1.'
+
+        self.size = size
+        self.max_messages = max_messages
+        self.retries = retries
+        self.backend = backend
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self):
+        """
+        Return an idle connection, creating one if the pool is not yet full
+        and blocking until one is released otherwise. Raises
+        `ConnectionPoolTimeout` when none is released within `timeout`.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return PooledConnection(self.backend)
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ConnectionPoolTimeout(
+                'No e-mail connection available after %s seconds.' %
+                self.timeout
+            )
+
+    def release(self, connection, discard=False):
+        """
+        Return `connection` to the pool, closing it when it is broken
+        (`discard`) or has reached the maximum amount of messages.
+        """
+        if discard or self.is_exhausted(connection):
+            logger.debug(
+                'Recycling connection after %d messages.', connection.sent
+            )
+            connection.close()
+
+        self._idle.put(connection)
+
+    def is_exhausted(self, connection):
+        return bool(
+            self.max_messages and connection.sent >= self.max_messages
+        )
+
+    def send_messages(self, messages):
+        """
+        Send a list of messages over a pooled connection, reconnecting on
+        connection errors and retrying the messages not sent yet. Returns
+        the amount of messages sent.
+
+        Messages are handed to the backend one at a time, so after an
+        error it is known which messages went out already. Rejections of
+        a message (`MESSAGE_ERRORS`) are raised right away.
+        """
+        attempt = 0
+        position = 0
+        sent = 0
+
+        while position < len(messages):
+            connection = self.acquire()
+            # Connections are discarded on other errors, as their state is
+            # unknown.
+            discard = True
+
+            try:
+                while position < len(messages):
+                    sent += connection.send_messages([messages[position]])
+                    position += 1
+
+                    if self.is_exhausted(connection):
+                        break
+
+                discard = False
+
+            except MESSAGE_ERRORS:
+                # Permanent rejection of this message; retrying is futile.
+                # Checked first, as SMTPException is a socket.error on
+                # Python 3.
+                discard = False
+                raise
+
+            except CONNECTION_ERRORS as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+
+                logger.warning(
+                    'Error %s while sending e-mail, reconnecting '
+                    '(attempt %d of %d).', e, attempt, self.retries
+                )
+
+            finally:
+                self.release(connection, discard=discard)
+
+        return sent
+
+    def send(self, message):
+        """ Send a single message over a pooled connection. """
+        return self.send_messages([message])
+
+    def close(self):
+        """ Close all idle connections in the pool. """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            connection.close()
+
+            with self._lock:
+                self._created -= 1
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """ Return the process-wide default connection pool. """
+    global _default_pool
+
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+
+    return _default_pool
+
+
+@receiver(setting_changed)
+def reset_connection_pool(**kwargs):
+    """
+    Discard the default pool when e-mail settings change (i.e. in tests),
+    so that new connections are made with the new settings.
+    """
+    global _default_pool
+
+    if kwargs['setting'].startswith('EMAIL_'):
+        with _default_pool_lock:
+            if _default_pool is not None:
+                _default_pool.close()
+                _default_pool = None
@@ -0,0 +1,151 @@
+""" Concurrent delivery of e-mail messages over pooled connections. """
+
+import logging
+logger = logging.getLogger(__name__)
+
+import threading
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from .connections import (
+    ConnectionPool, CONNECTION_ERRORS, MESSAGE_ERRORS
+)
+from .settings import newsletter_settings
+
+
+class DeliveryReport(object):
+    """
+    Outcome of a delivery run, in the order in which messages were given.
+    Messages which have not been attempted (i.e. on interruption) are
+    neither in `sent` nor in `failed`.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.results = [None] * len(messages)
+
+    @property
+    def sent(self):
+        return [
+            message for message, result in zip(self.messages, self.results)
+            if result is True
+        ]
+
+    @property
+    def failed(self):
+        return [
+            (message, result)
+            for message, result in zip(self.messages, self.results)
+            if result not in (None, True)
+        ]
+
+    @property
+    def pending(self):
+        return [
+            message for message, result in zip(self.messages, self.results)
+            if result is None
+        ]
+
+
+class ThreadedDelivery(object):
+    """
+    Send messages using a bounded pool of worker threads, each of which
+    uses its own (pooled) connection to the e-mail backend.
+
+    As most of the time sending mail is spent waiting on the SMTP socket,
+    this allows for much higher throughput than sending serially.
+    """
+
+    def __init__(self, workers=None, backend=None):
+        if workers is None:
+            workers = newsletter_settings.DELIVERY_WORKERS
+
+        assert workers > 0, 'At least one worker is required.'
+
+        self.workers = workers
+        self.pool = ConnectionPool(size=workers, backend=backend)
+
+        self._stop = threading.Event()
+
+    def stop(self):
+        """
+        Stop delivery; workers finish the message at hand and exit.
+        """
+        self._stop.set()
+
+    def _work(self, tasks, report):
+        while not self._stop.is_set():
+            try:
+                index, message = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                self.pool.send(message)
+            except CONNECTION_ERRORS + MESSAGE_ERRORS as e:
+                logger.error(
+                    'Error %s while submitting email to %s.',
+                    e, ', '.join(message.recipients())
+                )
+                report.results[index] = e
+            except Exception as e:
+                # Keep the worker alive for the remaining messages
+                logger.exception(
+                    'Unexpected error while submitting email to %s.',
+                    ', '.join(message.recipients())
+                )
+                report.results[index] = e
+            else:
+                report.results[index] = True
+
+    def deliver(self, messages):
+        """
+        Deliver `messages`, returning a `DeliveryReport`. When interrupted,
+        workers are shut down cleanly and the report for the messages
+        handled so far is available as `self.report` before the interrupt
+        is propagated.
+        """
+        messages = list(messages)
+
+        self._stop.clear()
+        self.report = DeliveryReport(messages)
+
+        tasks = queue.Queue()
+        for task in enumerate(messages):
+            tasks.put(task)
+
+        threads = [
+            threading.Thread(target=self._work, args=(tasks, self.report))
+            for x in range(min(self.workers, len(messages)))
+        ]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            # Join with a timeout; joining indefinitely blocks signals on
+            # Python 2.
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(0.1)
+
+        except (KeyboardInterrupt, SystemExit):
+            logger.warning(
+                'Delivery interrupted, waiting for workers to finish.'
+            )
+            self.stop()
+
+            for thread in threads:
+                thread.join()
+
+            raise
+
+        finally:
+            self.pool.close()
+
+        return self.report
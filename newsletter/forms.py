@@ -6,9 +6,28 @@ from django.forms.util import ValidationError
 from .utils import get_user_model
 User = get_user_model()
 
+from . import cache as status_cache
 from .models import Subscription
 
 
+def get_registered_username(email):
+    """
+    Return the username of the user with `email`, or an empty string when
+    there is none. Cached when `NEWSLETTER_STATUS_CACHE` is set.
+    """
+    username = status_cache.get_registered_user(email)
+
+    if username is None:
+        try:
+            username = User.objects.get(email__exact=email).username
+        except User.DoesNotExist:
+            username = ''
+
+        status_cache.set_registered_user(email, username)
+
+    return username
+
+
 class NewsletterForm(forms.ModelForm):
     """ This is the base class for all forms managing subscriptions. """
 
@@ -50,37 +69,42 @@ class SubscribeRequestForm(NewsletterForm):
             raise ValidationError(_("An e-mail address is required."))
 
         # Check whether we should be subscribed to as a user
-        try:
-            user = User.objects.get(email__exact=data)
-
+        if get_registered_username(data):
             raise ValidationError(_(
                 "The e-mail address '%(email)s' belongs to a user with an "
                 "account on this site. Please log in as that user "
                 "and try again."
-            ) % {'email': user.email})
-
-        except User.DoesNotExist:
-            pass
+            ) % {'email': data})
 
         # Check whether we have already been subscribed to
+        newsletter = self.instance.newsletter
+        state = status_cache.get_subscription_state(newsletter.pk, data)
+
+        if state == status_cache.SUBSCRIBED:
+            raise ValidationError(
+                _("Your e-mail address has already been subscribed to.")
+            )
+
         try:
-            subscription = Subscription.objects.get(
-                email_field__exact=data,
-                newsletter=self.instance.newsletter
+            subscription = Subscription.objects.get_by_email(
+                newsletter, data
+            )
+
+        except Subscription.DoesNotExist:
+            pass
+
+        else:
+            status_cache.set_subscription_state(
+                newsletter.pk, data, subscription
             )
 
             if subscription.subscribed and not subscription.unsubscribed:
-                raise ValidationError(
-                    _("Your e-mail address has already been subscribed to.")
-                )
-            else:
-                self.instance = subscription
+                raise ValidationError(_(
+                    "Your e-mail address has already been subscribed to."
+                ))
 
             self.instance = subscription
 
-        except Subscription.DoesNotExist:
-            pass
-
         return data
 
 
@@ -108,30 +132,32 @@ class UpdateRequestForm(NewsletterForm):
             raise ValidationError(_("An e-mail address is required."))
 
         # Check whether we should update as a user
-        try:
-            user = User.objects.get(email__exact=data)
-
+        username = get_registered_username(data)
+        if username:
             raise ValidationError(
                 _("This e-mail address belongs to the user '%(username)s'. "
                   "Please log in as that user and try again.")
-                % {'username': user.username}
+                % {'username': username}
             )
 
-        except User.DoesNotExist:
-            pass
-
         # Set our instance on the basis of the email field, or raise
         # a validationerror
+        newsletter = self.instance.newsletter
+
         try:
-            self.instance = Subscription.objects.get(
-                newsletter=self.instance.newsletter,
-                email_field__exact=data
+            subscription = Subscription.objects.get_by_email(
+                newsletter, data
             )
-
         except Subscription.DoesNotExist:
-                raise ValidationError(
-                    _("This e-mail address has not been subscribed to.")
-                )
+            raise ValidationError(
+                _("This e-mail address has not been subscribed to.")
+            )
+
+        status_cache.set_subscription_state(
+            newsletter.pk, data, subscription
+        )
+
+        self.instance = subscription
 
         return data
 
@@ -156,10 +182,17 @@ class UpdateForm(NewsletterForm):
     This form allows one to actually update to or unsubscribe from the
     newsletter. To do this, a correct activation code is required.
     """
+
+    def __init__(self, *args, **kwargs):
+        # Action the activation code should be valid for
+        self.action = kwargs.pop('action', None)
+
+        super(UpdateForm, self).__init__(*args, **kwargs)
+
     def clean_user_activation_code(self):
         data = self.cleaned_data['user_activation_code']
 
-        if data != self.instance.activation_code:
+        if not self.instance.check_activation_code(self.action, data):
             raise ValidationError(
                 _('The validation code supplied by you does not match.')
             )
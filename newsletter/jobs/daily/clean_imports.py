@@ -0,0 +1,24 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from datetime import timedelta
+
+from django_extensions.management.jobs import DailyJob
+
+from django.utils.timezone import now
+from django.utils.translation import ugettext as _
+from newsletter.models import AddressImport
+
+
+class Job(DailyJob):
+    help = "Delete address imports which have never been confirmed."
+
+    def execute(self):
+        logger.info(_('Deleting abandoned address imports'))
+
+        # Delete one by one, so uploaded files are deleted as well
+        for address_import in AddressImport.objects.filter(
+            create_date__lt=now() - timedelta(days=1)
+        ).exclude(status=AddressImport.RUNNING).iterator():
+            address_import.delete()
@@ -0,0 +1,18 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from django_extensions.management.jobs import DailyJob
+
+from django.utils.translation import ugettext as _
+from newsletter.models import Newsletter
+
+
+class Job(DailyJob):
+    help = "Repair drift of newsletter subscriber counters."
+
+    def execute(self):
+        logger.info(_('Reconciling newsletter subscriber counters'))
+
+        for newsletter in Newsletter.objects.all():
+            newsletter.reconcile_counters()
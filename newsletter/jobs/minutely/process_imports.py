@@ -0,0 +1,16 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from django_extensions.management.jobs import MinutelyJob
+
+from django.utils.translation import ugettext as _
+from newsletter.admin_forms import process_imports
+
+
+class Job(MinutelyJob):
+    help = "Read uploaded address files."
+
+    def execute(self):
+        logger.info(_('Reading uploaded address files'))
+        process_imports()
@@ -1,12 +1,22 @@
 import logging
 logger = logging.getLogger(__name__)
 
-from django.db import models
-from django.db.models import permalink
+import uuid
 
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import permalink, F, Q, Count
+from django.db.models.signals import (
+    pre_save, post_save, pre_delete, post_delete
+)
+from django.dispatch import receiver
+
+from django.template import Context
 from django.template.loader import select_template
 
 from django.utils.timezone import now
+from django.utils.translation import ugettext
 
 from django.core.mail import EmailMultiAlternatives
 
@@ -15,12 +25,41 @@ from django.contrib.sites.managers import CurrentSiteManager
 
 from django.conf import settings
 
+from . import cache as status_cache
+from .connections import get_connection_pool
+from .delivery import ThreadedDelivery
+from .settings import newsletter_settings
+from .storage import import_storage, get_import_filename
 from .utils import (
-    make_activation_code, get_default_sites, ACTIONS
+    make_activation_token, check_activation_token,
+    get_default_sites, get_user_model, normalize_email, ACTIONS
 )
 
 User = settings.AUTH_USER_MODEL
 
+# Process-level cache of resolved (subject, text, html) templates, keyed by
+# (newsletter slug, action, send_html).
+_template_cache = {}
+
+
+def clear_template_cache():
+    """ Clear the cache of resolved message templates. """
+    _template_cache.clear()
+
+
+# Denormalized subscriber counters on Newsletter
+COUNTER_FIELDS = ('subscribed_count', 'unsubscribed_count', 'pending_count')
+
+
+def _counter_field(subscribed, unsubscribed):
+    """ Return the Newsletter counter a subscription state is counted in. """
+    if subscribed:
+        return 'subscribed_count'
+    elif unsubscribed:
+        return 'unsubscribed_count'
+    else:
+        return 'pending_count'
+
 
 class Newsletter(models.Model):
     site = models.ManyToManyField(Site, default=get_default_sites)
@@ -46,6 +85,17 @@ class Newsletter(models.Model):
         help_text='Whether or not to send HTML versions of e-mails.'
     )
 
+    # Maintained by Subscription, repaired by reconcile_counters()
+    subscribed_count = models.IntegerField(
+        default=0, editable=False, verbose_name='subscribed'
+    )
+    unsubscribed_count = models.IntegerField(
+        default=0, editable=False, verbose_name='unsubscribed'
+    )
+    pending_count = models.IntegerField(
+        default=0, editable=False, verbose_name='pending'
+    )
+
     objects = models.Manager()
 
     # Automatically filter the current site
@@ -60,6 +110,12 @@ class Newsletter(models.Model):
 
         assert action in ACTIONS + ('message', ), 'Unknown action: %s' % action
 
+        # Resolving templates walks all template loaders. Skip the cache
+        # in DEBUG mode, so changes to template files are picked up.
+        cache_key = (self.slug, action, self.send_html)
+        if not settings.DEBUG and cache_key in _template_cache:
+            return _template_cache[cache_key]
+
         # Common substitutions for filenames
         tpl_subst = {
             'action': action,
@@ -88,7 +144,36 @@ class Newsletter(models.Model):
             # HTML templates are not required
             html_template = None
 
-        return (subject_template, text_template, html_template)
+        templates = (subject_template, text_template, html_template)
+
+        if not settings.DEBUG:
+            _template_cache[cache_key] = templates
+
+        return templates
+
+    @classmethod
+    def warm_template_cache(cls):
+        """
+        Resolve templates for all newsletters and actions, i.e. on worker
+        startup.
+        """
+        for newsletter in cls.objects.all():
+            for action in ACTIONS + ('message', ):
+                newsletter.get_templates(action)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Counters are maintained by atomic updates, never overwrite
+            # them with possibly stale values.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.fields
+                if not (field.primary_key or field.name in COUNTER_FIELDS)
+            ]
+
+        super(Newsletter, self).save(*args, **kwargs)
+
+        # Make sure no templates resolved for the old state linger around.
+        clear_template_cache()
 
     def __unicode__(self):
         return self.title
@@ -140,6 +225,37 @@ class Newsletter(models.Model):
 
         return Subscription.objects.filter(newsletter=self, subscribed=True)
 
+    @classmethod
+    def update_counters(cls, newsletter_id, deltas):
+        """
+        Atomically apply `deltas`, a dict mapping counter fields to the
+        amount they change by, to the counters of a newsletter.
+        """
+        values = dict(
+            (field, F(field) + delta) for field, delta in deltas.items()
+            if delta
+        )
+
+        if values:
+            cls.objects.filter(pk=newsletter_id).update(**values)
+
+    def reconcile_counters(self):
+        """ Recount subscribers, repairing any drift of the counters. """
+        counts = dict.fromkeys(COUNTER_FIELDS, 0)
+
+        states = self.subscription_set.values(
+            'subscribed', 'unsubscribed'
+        ).annotate(count=Count('pk'))
+
+        for state in states:
+            field = _counter_field(state['subscribed'], state['unsubscribed'])
+            counts[field] += state['count']
+
+        Newsletter.objects.filter(pk=self.pk).update(**counts)
+
+        for field, count in counts.items():
+            setattr(self, field, count)
+
     @classmethod
     def get_default_id(cls):
         try:
@@ -151,6 +267,202 @@ class Newsletter(models.Model):
         return None
 
 
+class SubscriptionManager(models.Manager):
+    def get_by_email(self, newsletter, email):
+        """
+        Return the subscription of `email` to `newsletter`, ignoring case.
+        """
+        return self.get(
+            newsletter=newsletter, email_normalized=normalize_email(email)
+        )
+
+    def bulk_transition(self, queryset, action):
+        """
+        Apply `action` (subscribe/update/unsubscribe) to all subscriptions
+        in `queryset` the way `Subscription.update()` would, maintaining
+        (un)subscribe dates, but using set-based UPDATE statements in
+        batches of `NEWSLETTER_BULK_BATCH_SIZE`. Returns the amount of
+        subscriptions changed.
+        """
+
+        assert action in ACTIONS, 'Unknown action: %s' % action
+
+        # Only select subscriptions for which save() would transition.
+        if action == 'subscribe' or action == 'update':
+            pending = {'subscribed': False}
+            values = {
+                'subscribed': True,
+                'unsubscribed': False,
+                'subscribe_date': now()
+            }
+        else:
+            pending = {'unsubscribed': False}
+            values = {
+                'subscribed': False,
+                'unsubscribed': True,
+                'unsubscribe_date': now()
+            }
+
+        todo = queryset.filter(**pending).order_by('pk').values_list(
+            'pk', flat=True
+        )
+        batch_size = newsletter_settings.BULK_BATCH_SIZE
+
+        changed = 0
+        last_pk = 0
+        while True:
+            pks = list(todo.filter(pk__gt=last_pk)[:batch_size])
+            if not pks:
+                break
+
+            last_pk = pks[-1]
+
+            with transaction.atomic():
+                # Check the state again, as it might have changed since
+                # selecting the batch, and lock the rows so that it does not
+                # change before updating them and their counters.
+                batch = self.filter(pk__in=pks, **pending)
+                list(batch.select_for_update().values_list('pk', flat=True))
+
+                states = list(batch.values(
+                    'newsletter', 'subscribed', 'unsubscribed'
+                ).annotate(count=Count('pk')))
+
+                if status_cache.get_cache() is not None:
+                    invalidate = list(
+                        batch.values_list('newsletter', 'email_normalized')
+                    )
+                else:
+                    invalidate = []
+
+                changed += batch.update(**values)
+
+                # Move transitioned subscriptions to their new counter
+                new_field = _counter_field(
+                    values['subscribed'], values['unsubscribed']
+                )
+                deltas = {}
+                for state in states:
+                    newsletter_deltas = deltas.setdefault(
+                        state['newsletter'], dict.fromkeys(COUNTER_FIELDS, 0)
+                    )
+                    old_field = _counter_field(
+                        state['subscribed'], state['unsubscribed']
+                    )
+                    newsletter_deltas[old_field] -= state['count']
+                    newsletter_deltas[new_field] += state['count']
+
+                for newsletter_id, newsletter_deltas in deltas.items():
+                    Newsletter.update_counters(
+                        newsletter_id, newsletter_deltas
+                    )
+
+            # Only invalidate once committed, as concurrent requests would
+            # otherwise cache the old state again.
+            status_cache.invalidate_subscriptions(invalidate)
+
+        logger.debug(
+            u'Bulk transition %(action)s applied to %(changed)d '
+            u'subscriptions.', {
+                'action': action,
+                'changed': changed
+            }
+        )
+
+        return changed
+
+    def bulk_import(self, subscriptions):
+        """
+        Insert new, unsaved `subscriptions` (i.e. from an address import)
+        as subscribed, using `bulk_create()` in chunks of
+        `NEWSLETTER_BULK_BATCH_SIZE` within a single transaction.
+
+        Addresses already subscribed to are skipped, addresses with another
+        (unactivated or unsubscribed) subscription are left alone as
+        conflicts. Returns a dict with the amount of subscriptions
+        'inserted', 'skipped' and 'conflicted'.
+        """
+        summary = dict.fromkeys(('inserted', 'skipped', 'conflicted'), 0)
+
+        subscriptions = list(subscriptions)
+        batch_size = newsletter_settings.BULK_BATCH_SIZE
+        subscribe_date = now()
+        invalidate = []
+
+        with transaction.atomic():
+            for start in range(0, len(subscriptions), batch_size):
+                batch = subscriptions[start:start + batch_size]
+
+                for subscription in batch:
+                    subscription.email_normalized = normalize_email(
+                        subscription.email_field
+                    )
+
+                # Current state of the addresses in this batch
+                existing = {}
+                for newsletter_id, email, subscribed in self.filter(
+                    email_normalized__in=set(
+                        s.email_normalized for s in batch
+                    ),
+                    newsletter__in=set(s.newsletter_id for s in batch)
+                ).values_list('newsletter', 'email_normalized', 'subscribed'):
+                    key = (newsletter_id, email)
+                    existing[key] = existing.get(key, False) or subscribed
+
+                new = []
+                for subscription in batch:
+                    key = (
+                        subscription.newsletter_id,
+                        subscription.email_normalized
+                    )
+
+                    if key in existing:
+                        if existing[key]:
+                            summary['skipped'] += 1
+                        else:
+                            summary['conflicted'] += 1
+
+                        continue
+
+                    # Duplicates within the import count as subscribed
+                    existing[key] = True
+
+                    # State save() would have set for new subscriptions
+                    subscription.subscribed = True
+                    subscription.unsubscribed = False
+                    subscription.subscribe_date = subscribe_date
+
+                    new.append(subscription)
+
+                self.bulk_create(new)
+                summary['inserted'] += len(new)
+
+                counts = {}
+                for subscription in new:
+                    counts[subscription.newsletter_id] = \
+                        counts.get(subscription.newsletter_id, 0) + 1
+
+                for newsletter_id, count in counts.items():
+                    Newsletter.update_counters(
+                        newsletter_id, {'subscribed_count': count}
+                    )
+
+                invalidate.extend(
+                    (s.newsletter_id, s.email_normalized) for s in new
+                )
+
+        # Only invalidate once committed, as concurrent requests would
+        # otherwise cache the old state again.
+        status_cache.invalidate_subscriptions(invalidate)
+
+        logger.debug(
+            u'Bulk import of %(inserted)d subscriptions, skipped '
+            u'%(skipped)d, %(conflicted)d conflicts.', summary
+        )
+
+        return summary
+
+
 class Subscription(models.Model):
     user = models.ForeignKey(
         User, blank=True, null=True, verbose_name='user'
@@ -176,6 +488,12 @@ class Subscription(models.Model):
         blank=True, null=True
     )
 
+    # Maintained by save(), for case-insensitive lookups
+    email_normalized = models.EmailField(
+        verbose_name='normalized e-mail', editable=False,
+        blank=True, null=True
+    )
+
     def get_email(self):
         if self.user:
             return self.user.email
@@ -186,6 +504,76 @@ class Subscription(models.Model):
             self.email_field = email
     email = property(get_email, set_email)
 
+    def __init__(self, *args, **kwargs):
+        super(Subscription, self).__init__(*args, **kwargs)
+
+        self._remember_state()
+
+    # Fields of which the state as loaded from the database is remembered
+    TRACKED_FIELDS = (
+        'subscribed', 'unsubscribed', 'newsletter', 'email_normalized'
+    )
+
+    def _remember_state(self):
+        """
+        Remember the (un)subscribed state as loaded from or saved to the
+        database, so `save()` can detect transitions without a query.
+        Deferred fields are skipped, as reading them would cost a query.
+        """
+        self._old_state = {}
+
+        for name in self.TRACKED_FIELDS:
+            attname = self._meta.get_field(name).attname
+
+            if attname in self.__dict__:
+                self._old_state[name] = self.__dict__[attname]
+
+    def _get_old_state(self):
+        """
+        Return the remembered state, loading fields which were deferred
+        from the database.
+        """
+        missing = [
+            name for name in self.TRACKED_FIELDS
+            if name not in self._old_state
+        ]
+
+        if missing and self.pk is not None:
+            self._old_state.update(Subscription.objects.filter(
+                pk=self.pk
+            ).values(*missing)[0])
+
+        return self._old_state
+
+    def _update_counters(self, adding):
+        """ Update subscriber counters of the newsletter(s) involved. """
+        new = (
+            self.newsletter_id,
+            _counter_field(self.subscribed, self.unsubscribed)
+        )
+
+        if adding:
+            old = None
+        else:
+            old_state = self._get_old_state()
+            old = (
+                old_state['newsletter'], _counter_field(
+                    old_state['subscribed'], old_state['unsubscribed']
+                )
+            )
+
+        if old == new:
+            return
+
+        if old and old[0] == new[0]:
+            # Single query for a transition within the same newsletter
+            Newsletter.update_counters(new[0], {old[1]: -1, new[1]: 1})
+        else:
+            if old:
+                Newsletter.update_counters(old[0], {old[1]: -1})
+
+            Newsletter.update_counters(new[0], {new[1]: 1})
+
     def update(self, action):
         """
         Update subscription according to requested action:
@@ -243,25 +631,26 @@ class Subscription(models.Model):
         cleanup the code. Refer to comment below and
         https://docs.djangoproject.com/en/dev/ref/models/instances/#django.db.models.Model.clean
         """
-        assert self.user or self.email_field, \
+        # Compare against user_id, as to not fetch the user from the DB.
+        assert self.user_id or self.email_field, \
             'Neither an email nor a username is set. This asks for inconsistency!'
-        assert ((self.user and not self.email_field) or
-                (self.email_field and not self.user)), \
+        assert ((self.user_id and not self.email_field) or
+                (self.email_field and not self.user_id)), \
             'If user is set, email must be null and vice versa.'
 
-        # This is a lame way to find out if we have changed but using Django
-        # API internals is bad practice. This is necessary to discriminate
-        # from a state where we have never been subscribed but is mostly for
+        self.email_normalized = normalize_email(self.email_field)
+
+        # Transitions are derived from the state this instance was loaded
+        # (or last saved) with. This is necessary to discriminate from a
+        # state where we have never been subscribed but is mostly for
         # backward compatibility. It might be very useful to make this just
         # one attribute 'subscribe' later. In this case unsubscribed can be
         # replaced by a method property.
 
-        if self.pk:
-            assert(Subscription.objects.filter(pk=self.pk).count() == 1)
-
-            subscription = Subscription.objects.get(pk=self.pk)
-            old_subscribed = subscription.subscribed
-            old_unsubscribed = subscription.unsubscribed
+        if not self._state.adding:
+            old_state = self._get_old_state()
+            old_subscribed = old_state['subscribed']
+            old_unsubscribed = old_state['unsubscribed']
 
             # If we are subscribed now and we used not to be so, subscribe.
             # If we user to be unsubscribed but are not so anymore, subscribe.
@@ -287,17 +676,23 @@ class Subscription(models.Model):
             elif self.unsubscribed:
                 self._unsubscribe()
 
+        adding = self._state.adding
+
         super(Subscription, self).save(*args, **kwargs)
 
+        self._update_counters(adding)
+        self._remember_state()
+
     ip = models.IPAddressField("IP address", blank=True, null=True)
 
     newsletter = models.ForeignKey('Newsletter', verbose_name='newsletter')
 
     create_date = models.DateTimeField(editable=False, default=now)
 
+    # Only set for subscriptions made before activation links carried
+    # signed tokens, see check_activation_code().
     activation_code = models.CharField(
-        verbose_name='activation code', max_length=40,
-        default=make_activation_code
+        verbose_name='activation code', max_length=40, blank=True
     )
 
     subscribed = models.BooleanField(
@@ -315,6 +710,8 @@ class Subscription(models.Model):
         verbose_name="unsubscribe date", null=True, blank=True
     )
 
+    objects = SubscriptionManager()
+
     def __unicode__(self):
         if self.name:
             return u"%(name)s <%(email)s> to %(newsletter)s" % {
@@ -332,7 +729,17 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = 'subscription'
         verbose_name_plural = 'subscriptions'
-        unique_together = ('user', 'email_field', 'newsletter')
+        unique_together = (
+            ('user', 'email_field', 'newsletter'),
+            # Also serves lookups of subscriptions by e-mail address. As
+            # email_normalized is NULL for subscriptions of users, it only
+            # applies to subscriptions by e-mail address.
+            ('email_normalized', 'newsletter'),
+        )
+        index_together = (
+            # Recipient selection and filtering/ordering in the admin
+            ('newsletter', 'subscribed', 'unsubscribed', 'subscribe_date'),
+        )
 
     def get_recipient(self):
         if self.name:
@@ -340,7 +747,8 @@ class Subscription(models.Model):
 
         return u'%s' % (self.email)
 
-    def send_activation_email(self, action):
+    def get_activation_email(self, action):
+        """ Return the activation e-mail message for `action`. """
         assert action in ACTIONS, 'Unknown action: %s' % action
 
         (subject_template, text_template, html_template) = \
@@ -373,24 +781,66 @@ class Subscription(models.Model):
                 html_template.render(escaped_context), "text/html"
             )
 
-        message.send()
+        return message
+
+    def send_activation_email(self, action):
+        message = self.get_activation_email(action)
+
+        get_connection_pool().send(message)
+
+        logger.debug(
+            u'Activation email sent for action "%(action)s" to '
+            u'%(subscriber)s.', {
+                'action': action,
+                'subscriber': self
+            }
+        )
+
+    def queue_activation_email(self, action):
+        """
+        Queue the activation e-mail for `action` in the outbox, to be sent
+        by `ActivationEmail.send_queue()`.
+        """
+        assert action in ACTIONS, 'Unknown action: %s' % action
+
+        ActivationEmail.objects.create(subscription=self, action=action)
 
         logger.debug(
-            u'Activation email sent for action "%(action)s" to %(subscriber)s '
-            u'with activation code "%(action_code)s".', {
-                'action_code': self.activation_code,
+            u'Activation email queued for action "%(action)s" to '
+            u'%(subscriber)s.', {
                 'action': action,
                 'subscriber': self
             }
         )
 
+    def make_activation_token(self, action):
+        """ Return a signed activation token for `action`. """
+        return make_activation_token(self.pk, action, self.email)
+
+    def check_activation_code(self, action, code):
+        """
+        Return whether `code` activates `action`. Besides signed tokens,
+        stored activation codes from older e-mails are honoured while
+        `NEWSLETTER_LEGACY_ACTIVATION_CODES` is set.
+        """
+        if check_activation_token(
+            code, self.pk, action, self.email,
+            max_age=newsletter_settings.ACTIVATION_TOKEN_MAX_AGE
+        ):
+            return True
+
+        return (
+            newsletter_settings.LEGACY_ACTIVATION_CODES and
+            bool(self.activation_code) and code == self.activation_code
+        )
+
     @permalink
     def subscribe_activate_url(self):
         return ('newsletter_update_activate', (), {
             'newsletter_slug': self.newsletter.slug,
             'email': self.email,
             'action': 'subscribe',
-            'activation_code': self.activation_code
+            'activation_code': self.make_activation_token('subscribe')
         })
 
     @permalink
@@ -399,7 +849,7 @@ class Subscription(models.Model):
             'newsletter_slug': self.newsletter.slug,
             'email': self.email,
             'action': 'unsubscribe',
-            'activation_code': self.activation_code
+            'activation_code': self.make_activation_token('unsubscribe')
         })
 
     @permalink
@@ -408,5 +858,482 @@ class Subscription(models.Model):
             'newsletter_slug': self.newsletter.slug,
             'email': self.email,
             'action': 'update',
-            'activation_code': self.activation_code
+            'activation_code': self.make_activation_token('update')
+        })
+
+
+@receiver(pre_delete, sender=Subscription)
+def subscription_deleting(sender, instance, **kwargs):
+    """ Load deferred state, which can no longer be loaded once deleted. """
+    instance._get_old_state()
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    """
+    Remove deleted subscriptions from the subscriber counters and forget
+    cached status lookups for them.
+    """
+    old_state = instance._get_old_state()
+    field = _counter_field(
+        old_state['subscribed'], old_state['unsubscribed']
+    )
+
+    Newsletter.update_counters(old_state['newsletter'], {field: -1})
+
+    status_cache.invalidate_subscriptions([
+        (old_state['newsletter'], old_state['email_normalized'])
+    ])
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    """ Forget cached status lookups for changed subscriptions. """
+    old_state = instance._get_old_state()
+
+    status_cache.invalidate_subscriptions([
+        (instance.newsletter_id, instance.email_normalized),
+        (old_state['newsletter'], old_state['email_normalized'])
+    ])
+
+
+try:
+    from django.db.models.signals import ModelSignal
+except ImportError:
+    # Django < 1.7 does not resolve senders given as 'app_label.ModelName',
+    # but allows resolving the user model while loading models.
+    user_sender = get_user_model()
+else:
+    user_sender = User
+
+
+@receiver(pre_save, sender=user_sender)
+def user_changing(sender, instance, **kwargs):
+    """ Remember the former e-mail address of changed users. """
+    if instance.pk is None or not hasattr(instance, 'email') or \
+            status_cache.get_cache() is None:
+        return
+
+    emails = list(sender._default_manager.filter(
+        pk=instance.pk
+    ).values_list('email', flat=True)[:1])
+
+    if emails:
+        instance._newsletter_old_email = emails[0]
+
+
+@receiver(post_save, sender=user_sender)
+@receiver(post_delete, sender=user_sender)
+def user_changed(sender, instance, **kwargs):
+    """
+    Forget cached registered user lookups for the current and former
+    e-mail address of changed users.
+    """
+    status_cache.invalidate_registered_user(getattr(instance, 'email', None))
+    status_cache.invalidate_registered_user(
+        instance.__dict__.pop('_newsletter_old_email', None)
+    )
+
+
+class ActivationEmail(models.Model):
+    """
+    Activation e-mail in the outbox, so that requests do not have to wait
+    for the e-mail backend. Sent in batches by `send_queue()`.
+    """
+    subscription = models.ForeignKey(
+        'Subscription', verbose_name='subscription'
+    )
+    action = models.CharField(
+        max_length=20, verbose_name='action',
+        choices=zip(ACTIONS, ACTIONS)
+    )
+
+    create_date = models.DateTimeField(editable=False, default=now)
+
+    sent = models.BooleanField(
+        default=False, verbose_name='sent', db_index=True
+    )
+    send_date = models.DateTimeField(
+        verbose_name='send date', null=True, blank=True
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0, verbose_name='attempts'
+    )
+    last_error = models.TextField(verbose_name='last error', blank=True)
+
+    # Set while a run of send_queue() is sending the e-mail
+    claim_key = models.CharField(
+        max_length=32, blank=True, db_index=True, editable=False
+    )
+    claim_date = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        verbose_name = 'activation e-mail'
+        verbose_name_plural = 'activation e-mails'
+
+    def __unicode__(self):
+        return u'%(action)s e-mail for %(subscription)s' % {
+            'action': self.action,
+            'subscription': self.subscription
+        }
+
+    @classmethod
+    def claim_batch(cls, pks):
+        """
+        Claim the queued e-mails with `pks` which are not claimed by
+        another run, returning them. E-mails sent or given up on since
+        `pks` were selected are skipped.
+        """
+        claim_key = uuid.uuid4().hex
+
+        cls.objects.filter(
+            pk__in=pks, sent=False,
+            attempts__lt=newsletter_settings.OUTBOX_MAX_ATTEMPTS
+        ).filter(
+            Q(claim_date__isnull=True) | Q(claim_date__lt=now() - timedelta(
+                seconds=newsletter_settings.OUTBOX_CLAIM_TIMEOUT
+            ))
+        ).update(claim_key=claim_key, claim_date=now())
+
+        return list(cls.objects.filter(claim_key=claim_key).select_related(
+            'subscription', 'subscription__newsletter',
+            'subscription__user'
+        ).order_by('pk'))
+
+    @classmethod
+    def send_queue(cls):
+        """
+        Send all queued activation e-mails in batches over pooled
+        connections. Failed e-mails are retried in later runs, up to
+        `NEWSLETTER_OUTBOX_MAX_ATTEMPTS` times. E-mails are claimed before
+        sending, so that overlapping runs do not send them twice.
+        """
+        todo = cls.objects.filter(
+            sent=False,
+            attempts__lt=newsletter_settings.OUTBOX_MAX_ATTEMPTS
+        ).order_by('pk')
+
+        batch_size = newsletter_settings.OUTBOX_BATCH_SIZE
+
+        logger.info(u'Sending queued activation emails.')
+
+        # Process every e-mail at most once per run by walking the pk's
+        last_pk = 0
+        while True:
+            pks = list(
+                todo.filter(pk__gt=last_pk).values_list('pk', flat=True)[
+                    :batch_size
+                ]
+            )
+            if not pks:
+                break
+
+            last_pk = pks[-1]
+
+            claimed = cls.claim_batch(pks)
+
+            batch = []
+            messages = []
+            failed = []
+            for email in claimed:
+                try:
+                    messages.append(email.subscription.get_activation_email(
+                        email.action
+                    ))
+                except Exception as e:
+                    logger.exception(
+                        u'Error rendering queued activation email %d.',
+                        email.pk
+                    )
+                    failed.append((email, e))
+                else:
+                    batch.append(email)
+
+            report = ThreadedDelivery().deliver(messages)
+
+            sent = [
+                email.pk for email, result in zip(batch, report.results)
+                if result is True
+            ]
+            cls.objects.filter(pk__in=sent).update(
+                sent=True, send_date=now(), attempts=F('attempts') + 1,
+                claim_key='', claim_date=None
+            )
+
+            failed.extend(
+                (email, result)
+                for email, result in zip(batch, report.results)
+                if result not in (None, True)
+            )
+            for email, error in failed:
+                cls.objects.filter(pk=email.pk).update(
+                    attempts=F('attempts') + 1, last_error=u'%s' % error,
+                    claim_key='', claim_date=None
+                )
+
+            logger.info(
+                u'Sent %(sent)d of %(total)d queued activation emails.', {
+                    'sent': len(sent),
+                    'total': len(claimed)
+                }
+            )
+
+
+class AddressImport(models.Model):
+    """
+    Import of an address file, which is parsed in the background (see
+    `newsletter.admin_forms.process_imports()`). Parsed addresses are
+    staged as `StagedAddress` until the import is confirmed.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'pending'),
+        (RUNNING, 'running'),
+        (FINISHED, 'finished'),
+        (FAILED, 'failed'),
+    )
+
+    PROGRESS_FIELDS = ('rows_read', 'valid', 'duplicates', 'errors')
+
+    newsletter = models.ForeignKey(
+        'Newsletter', verbose_name='newsletter'
+    )
+    create_date = models.DateTimeField(editable=False, default=now)
+
+    address_file = models.FileField(
+        upload_to=get_import_filename, storage=import_storage, blank=True,
+        verbose_name='address file'
+    )
+    ignore_errors = models.BooleanField(
+        default=False, verbose_name='ignore non-fatal errors'
+    )
+
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING,
+        db_index=True, verbose_name='status'
+    )
+    error_message = models.TextField(
+        blank=True, verbose_name='error message'
+    )
+    # Set when claimed and on progress, to tell interrupted imports apart
+    claim_date = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+
+    # Progress, updated while parsing
+    rows_read = models.PositiveIntegerField(
+        default=0, verbose_name='rows read'
+    )
+    valid = models.PositiveIntegerField(default=0, verbose_name='valid')
+    duplicates = models.PositiveIntegerField(
+        default=0, verbose_name='duplicates'
+    )
+    errors = models.PositiveIntegerField(default=0, verbose_name='errors')
+
+    class Meta:
+        verbose_name = 'address import'
+        verbose_name_plural = 'address imports'
+
+    def __unicode__(self):
+        return u'import of %(date)s to %(newsletter)s' % {
+            'date': self.create_date,
+            'newsletter': self.newsletter
+        }
+
+    def delete(self, *args, **kwargs):
+        super(AddressImport, self).delete(*args, **kwargs)
+
+        if self.address_file:
+            self.address_file.delete(save=False)
+
+    def claim(self):
+        """
+        Mark this pending import as running. Returns False when another
+        worker has claimed it already.
+        """
+        claim_date = now()
+
+        claimed = AddressImport.objects.filter(
+            pk=self.pk, status=self.PENDING
+        ).update(status=self.RUNNING, claim_date=claim_date)
+
+        if claimed:
+            self.status = self.RUNNING
+            self.claim_date = claim_date
+
+        return bool(claimed)
+
+    def update_progress(self, **progress):
+        """ Save progress counts, as given for `PROGRESS_FIELDS`. """
+        for field, value in progress.items():
+            assert field in self.PROGRESS_FIELDS, \
+                'Unknown progress field: %s' % field
+
+            setattr(self, field, value)
+
+        self.claim_date = now()
+
+        self.save(update_fields=progress.keys() + ['claim_date'])
+
+    def finish(self, status, error_message=''):
+        """
+        Set the final status of this running import. Returns False when
+        it has been failed for being interrupted in the meantime.
+        """
+        finished = AddressImport.objects.filter(
+            pk=self.pk, status=self.RUNNING
+        ).update(status=status, error_message=error_message)
+
+        if finished:
+            self.status = status
+            self.error_message = error_message
+
+        return bool(finished)
+
+    @classmethod
+    def fail_interrupted(cls):
+        """
+        Fail running imports which have not made progress for
+        `NEWSLETTER_IMPORT_TIMEOUT` seconds, i.e. as their worker died.
+        """
+        interrupted = cls.objects.filter(
+            Q(claim_date__isnull=True) | Q(claim_date__lt=now() - timedelta(
+                seconds=newsletter_settings.IMPORT_TIMEOUT
+            )),
+            status=cls.RUNNING
+        )
+
+        for address_import in interrupted:
+            failed = cls.objects.filter(
+                pk=address_import.pk, status=cls.RUNNING,
+                claim_date=address_import.claim_date
+            ).update(status=cls.FAILED, error_message=ugettext(
+                "Reading the file was interrupted, please upload it again."
+            ))
+
+            if failed:
+                logger.error('Reading %s was interrupted.', address_import)
+
+                address_import.addresses.all().delete()
+
+    def get_progress(self):
+        """ Return status and progress as a dict, i.e. for polling. """
+        progress = dict(
+            (field, getattr(self, field)) for field in self.PROGRESS_FIELDS
+        )
+        progress.update({
+            'status': self.status,
+            'error_message': self.error_message
         })
+
+        return progress
+
+    def stage(self, subscriptions):
+        """
+        Stage new, unsaved `subscriptions` as parsed from the address file,
+        in chunks of `NEWSLETTER_BULK_BATCH_SIZE`.
+        """
+        batch_size = newsletter_settings.BULK_BATCH_SIZE
+
+        batch = []
+        for subscription in subscriptions:
+            batch.append(StagedAddress(
+                address_import=self,
+                email=subscription.email_field,
+                name=subscription.name_field
+            ))
+
+            if len(batch) >= batch_size:
+                StagedAddress.objects.bulk_create(batch)
+                batch = []
+
+        if batch:
+            StagedAddress.objects.bulk_create(batch)
+
+    def get_subscriptions(self):
+        """
+        Generate lists of new, unsaved subscriptions for the staged
+        addresses, in chunks of `NEWSLETTER_BULK_BATCH_SIZE`.
+        """
+        todo = self.addresses.order_by('pk')
+        batch_size = newsletter_settings.BULK_BATCH_SIZE
+
+        last_pk = 0
+        while True:
+            batch = list(todo.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+
+            last_pk = batch[-1].pk
+
+            subscriptions = []
+            for address in batch:
+                subscription = Subscription(
+                    newsletter_id=self.newsletter_id, subscribed=True
+                )
+                subscription.email_field = address.email
+                subscription.email_normalized = normalize_email(address.email)
+
+                if address.name:
+                    subscription.name_field = address.name
+
+                subscriptions.append(subscription)
+
+            yield subscriptions
+
+    def confirm(self):
+        """
+        Subscribe all staged addresses and delete this import. Returns a
+        summary as `SubscriptionManager.bulk_import()` does.
+        """
+        summary = dict.fromkeys(('inserted', 'skipped', 'conflicted'), 0)
+
+        with transaction.atomic():
+            for subscriptions in self.get_subscriptions():
+                batch_summary = Subscription.objects.bulk_import(
+                    subscriptions
+                )
+
+                for key, value in batch_summary.items():
+                    summary[key] += value
+
+            super(AddressImport, self).delete()
+
+        # Only delete the file once committed, as it is still needed when
+        # rolling back.
+        if self.address_file:
+            self.address_file.delete(save=False)
+
+        return summary
+
+
+class StagedAddress(models.Model):
+    """ Address parsed from the file of an `AddressImport`. """
+    address_import = models.ForeignKey(
+        'AddressImport', related_name='addresses',
+        verbose_name='address import'
+    )
+    email = models.EmailField(verbose_name='e-mail')
+    name = models.CharField(
+        max_length=30, blank=True, null=True, verbose_name='name'
+    )
+
+    class Meta:
+        verbose_name = 'staged address'
+        verbose_name_plural = 'staged addresses'
+
+    def __unicode__(self):
+        if self.name:
+            return u'%(name)s <%(email)s>' % {
+                'name': self.name,
+                'email': self.email
+            }
+        else:
+            return self.email
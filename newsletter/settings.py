@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from django.conf import settings as django_settings
 from django.utils.importlib import import_module
 from django.core.exceptions import ImproperlyConfigured
@@ -77,6 +80,72 @@ class NewsletterSettings(Settings):
     def DEFAULT_CONFIRM_EMAIL_UPDATE(self):
         return self.CONFIRM_EMAIL
 
+    # Amount of seconds activation links remain valid
+    DEFAULT_ACTIVATION_TOKEN_MAX_AGE = 60 * 60 * 24 * 30
+
+    # Accept activation codes stored with subscriptions, as used in links
+    # sent before activation tokens were signed. New subscriptions have no
+    # stored code.
+    DEFAULT_LEGACY_ACTIVATION_CODES = True
+
+    # Maximum amount of simultaneous connections to the e-mail backend
+    DEFAULT_CONNECTION_POOL_SIZE = 4
+
+    # Amount of seconds to wait for a pooled connection to become available
+    DEFAULT_CONNECTION_POOL_TIMEOUT = 30
+
+    # Amount of messages after which a pooled connection is recycled
+    DEFAULT_CONNECTION_MAX_MESSAGES = 100
+
+    # Amount of reconnection attempts after connection errors
+    DEFAULT_CONNECTION_RETRIES = 2
+
+    # Amount of worker threads, each with its own connection, for delivery
+    DEFAULT_DELIVERY_WORKERS = 1
+
+    # Amount of rows handled per statement in bulk operations
+    DEFAULT_BULK_BATCH_SIZE = 500
+
+    # Directory where uploaded address files are kept until they are read;
+    # should not be served on the web and be shared by the web server and
+    # the jobs.
+    DEFAULT_IMPORT_ROOT = os.path.join(
+        tempfile.gettempdir(), 'newsletter-imports'
+    )
+
+    # Amount of seconds without progress after which running imports are
+    # considered to have been interrupted
+    DEFAULT_IMPORT_TIMEOUT = 60 * 10
+
+    # Amount of processes validating imported addresses, validating in the
+    # importing process itself when 1 (the default, as validation is only a
+    # small part of importing)
+    DEFAULT_IMPORT_PROCESSES = 1
+
+    # Amount of imported addresses validated at once by a single process
+    DEFAULT_IMPORT_CHUNK_SIZE = 2000
+
+    # Queue activation e-mails in the outbox instead of sending them
+    # during the request
+    DEFAULT_ACTIVATION_OUTBOX = False
+
+    # Amount of queued activation e-mails sent per batch
+    DEFAULT_OUTBOX_BATCH_SIZE = 100
+
+    # Amount of attempts after which a queued e-mail is given up on
+    DEFAULT_OUTBOX_MAX_ATTEMPTS = 5
+
+    # Amount of seconds after which queued e-mails claimed by a run which
+    # did not finish are sent by later runs
+    DEFAULT_OUTBOX_CLAIM_TIMEOUT = 60 * 60
+
+    # Alias of the cache used for subscription status lookups in forms,
+    # disabled when empty
+    DEFAULT_STATUS_CACHE = None
+
+    # Amount of seconds subscription status lookups are cached
+    DEFAULT_STATUS_CACHE_TIMEOUT = 60 * 60
+
     @property
     def RICHTEXT_WIDGET(self):
         # Import and set the richtext field
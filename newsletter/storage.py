@@ -0,0 +1,72 @@
+""" Private storage of uploaded address files. """
+
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.functional import LazyObject, empty
+
+from .settings import newsletter_settings
+
+
+class PrivateFileSystemStorage(FileSystemStorage):
+    """
+    File system storage of files which should not be served on the web,
+    readable by the owner only.
+    """
+
+    # Applied in _save(), as FileSystemStorage takes no permission arguments
+    # before Django 1.7
+    file_mode = 0o600
+    directory_mode = 0o700
+
+    def __init__(self, location):
+        super(PrivateFileSystemStorage, self).__init__(location=location)
+
+    def _save(self, name, content):
+        directory = os.path.dirname(self.path(name))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, self.directory_mode)
+
+        name = super(PrivateFileSystemStorage, self)._save(name, content)
+        os.chmod(self.path(name), self.file_mode)
+
+        return name
+
+    def url(self, name):
+        raise ValueError('Files in %s have no URL.' % self.location)
+
+
+class ImportStorage(LazyObject):
+    """
+    Storage of uploaded address files in `NEWSLETTER_IMPORT_ROOT`, set up
+    when first used.
+    """
+
+    def _setup(self):
+        self._wrapped = PrivateFileSystemStorage(
+            newsletter_settings.IMPORT_ROOT
+        )
+
+
+import_storage = ImportStorage()
+
+
+def get_import_filename(instance, filename):
+    """
+    Return a random name for an uploaded address file, so that it cannot
+    be guessed from the original name. The extension is kept, as it
+    determines how the file is read.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+
+    return u'%s%s' % (uuid.uuid4().hex, extension)
+
+
+@receiver(setting_changed)
+def reset_import_storage(**kwargs):
+    """ Set up the storage again when its location changes (i.e. in tests). """
+    if kwargs['setting'] == 'NEWSLETTER_IMPORT_ROOT':
+        import_storage._wrapped = empty
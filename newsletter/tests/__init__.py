@@ -9,7 +9,21 @@ from .test_web import (
 from .test_mailing import (
     MailingTestCase, ArticleTestCase, CreateSubmissionTestCase,
     SubmitSubmissionTestCase, SubscriptionTestCase, HtmlEmailsTestCase,
-    TextOnlyEmailsTestCase, TemplateOverridesTestCase
+    TextOnlyEmailsTestCase, TemplateOverridesTestCase, TemplateCacheTestCase
 )
 
 from .test_settings import SettingsTestCase
+
+from .test_subscriptions import (
+    SaveTestCase, CountersTestCase, BulkTransitionTestCase
+)
+
+from .test_connections import (
+    ConnectionPoolTestCase, ThreadedDeliveryTestCase, OutboxTestCase
+)
+
+from .test_import import (
+    BloomFilterTestCase, ImportTestCase, ValidationTestCase,
+    ParallelValidationTestCase, ImportJobTestCase, CSVImportTestCase,
+    LDIFTestCase
+)
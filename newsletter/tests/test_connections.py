@@ -0,0 +1,335 @@
+import socket
+
+from smtplib import SMTPRecipientsRefused
+
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+
+from django.test import TestCase
+
+from django.utils.timezone import now
+
+from ..connections import ConnectionPool, ConnectionPoolTimeout
+from ..delivery import ThreadedDelivery
+from ..models import Newsletter, Subscription, ActivationEmail
+from ..settings import newsletter_settings
+
+
+class CountingEmailBackend(EmailBackend):
+    """ Locmem backend counting the amount of opened connections. """
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+
+
+class FailingEmailBackend(CountingEmailBackend):
+    """ Locmem backend failing to send the first message it sees. """
+    failures = 1
+
+    def send_messages(self, messages):
+        if FailingEmailBackend.failures:
+            FailingEmailBackend.failures -= 1
+            raise socket.error('Connection reset by peer')
+
+        return super(FailingEmailBackend, self).send_messages(messages)
+
+
+class SecondMessageFailingEmailBackend(CountingEmailBackend):
+    """ Locmem backend failing once at the second message it sees. """
+    seen = 0
+
+    def send_messages(self, messages):
+        for message in messages:
+            SecondMessageFailingEmailBackend.seen += 1
+            if SecondMessageFailingEmailBackend.seen == 2:
+                raise socket.error('Connection reset by peer')
+
+            super(SecondMessageFailingEmailBackend, self).send_messages(
+                [message]
+            )
+
+        return len(messages)
+
+
+class RejectingEmailBackend(CountingEmailBackend):
+    """ Locmem backend refusing the recipients of the first message. """
+    rejections = 1
+
+    def send_messages(self, messages):
+        if RejectingEmailBackend.rejections:
+            RejectingEmailBackend.rejections -= 1
+            raise SMTPRecipientsRefused({
+                'test@test.com': (550, 'No such user')
+            })
+
+        return super(RejectingEmailBackend, self).send_messages(messages)
+
+
+class BrokenEmailBackend(CountingEmailBackend):
+    """ Locmem backend failing to send with a non-connection error. """
+
+    def send_messages(self, messages):
+        raise ValueError('Unable to render message')
+
+
+class ConnectionPoolTestCase(TestCase):
+    backend = 'newsletter.tests.test_connections.CountingEmailBackend'
+
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+        FailingEmailBackend.failures = 1
+        SecondMessageFailingEmailBackend.seen = 0
+        RejectingEmailBackend.rejections = 1
+
+    def get_message(self):
+        return EmailMessage(
+            'Test subject', 'Test body', 'test@testsender.com',
+            ['test@test.com']
+        )
+
+    def test_reuse(self):
+        """ Messages are sent over a single connection. """
+        pool = ConnectionPool(size=1, max_messages=0, backend=self.backend)
+
+        for x in range(3):
+            pool.send(self.get_message())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+
+    def test_recycle(self):
+        """ Connections are recycled after `max_messages` messages. """
+        pool = ConnectionPool(size=1, max_messages=2, backend=self.backend)
+
+        for x in range(3):
+            pool.send(self.get_message())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+    def test_reconnect(self):
+        """ Connection errors result in a retry over a new connection. """
+        pool = ConnectionPool(
+            size=1, retries=1,
+            backend='newsletter.tests.test_connections.FailingEmailBackend'
+        )
+
+        pool.send(self.get_message())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+    def test_retries_exhausted(self):
+        """ Errors are raised when no retries are left. """
+        pool = ConnectionPool(
+            size=1, retries=0,
+            backend='newsletter.tests.test_connections.FailingEmailBackend'
+        )
+
+        self.assertRaises(socket.error, pool.send, self.get_message())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_retry_unsent(self):
+        """ After an error, only messages not sent yet are retried. """
+        pool = ConnectionPool(
+            size=1, retries=1, backend='newsletter.tests.test_connections.'
+            'SecondMessageFailingEmailBackend'
+        )
+
+        messages = [self.get_message() for x in range(3)]
+
+        self.assertEqual(pool.send_messages(messages), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+    def test_rejected(self):
+        """ Rejected messages are not retried and keep the connection. """
+        pool = ConnectionPool(
+            size=1, retries=2,
+            backend='newsletter.tests.test_connections.RejectingEmailBackend'
+        )
+
+        self.assertRaises(
+            SMTPRecipientsRefused, pool.send, self.get_message()
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+        pool.send(self.get_message())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+
+    def test_release_on_error(self):
+        """ Connections are released on any error. """
+        pool = ConnectionPool(
+            size=1, timeout=0.1,
+            backend='newsletter.tests.test_connections.BrokenEmailBackend'
+        )
+
+        for x in range(2):
+            self.assertRaises(ValueError, pool.send, self.get_message())
+
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+    def test_acquire_timeout(self):
+        """ Waiting for a connection times out. """
+        pool = ConnectionPool(size=1, timeout=0.01, backend=self.backend)
+
+        pool.acquire()
+
+        self.assertRaises(ConnectionPoolTimeout, pool.acquire)
+
+
+class ThreadedDeliveryTestCase(TestCase):
+    def setUp(self):
+        FailingEmailBackend.failures = 1
+
+        self.messages = [
+            EmailMessage(
+                'Test subject', 'Test body', 'test@testsender.com',
+                ['test%d@test.com' % x]
+            ) for x in range(5)
+        ]
+
+    def test_deliver(self):
+        """ All messages are delivered and reported in order. """
+        delivery = ThreadedDelivery(workers=3)
+        report = delivery.deliver(self.messages)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(report.sent, self.messages)
+        self.assertFalse(report.failed)
+        self.assertFalse(report.pending)
+
+    def test_failure(self):
+        """ Failed messages are reported along with their error. """
+        delivery = ThreadedDelivery(
+            workers=1,
+            backend='newsletter.tests.test_connections.FailingEmailBackend'
+        )
+        delivery.pool.retries = 0
+
+        report = delivery.deliver(self.messages)
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(report.sent, self.messages[1:])
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.failed[0][0], self.messages[0])
+        self.assert_(isinstance(report.failed[0][1], socket.error))
+
+    def test_rejected(self):
+        """ Rejected messages are reported as failed. """
+        RejectingEmailBackend.rejections = 1
+
+        delivery = ThreadedDelivery(
+            workers=1,
+            backend='newsletter.tests.test_connections.RejectingEmailBackend'
+        )
+
+        report = delivery.deliver(self.messages)
+
+        self.assertEqual(report.sent, self.messages[1:])
+        self.assertEqual(len(report.failed), 1)
+        self.assert_(
+            isinstance(report.failed[0][1], SMTPRecipientsRefused)
+        )
+
+    def test_unexpected_error(self):
+        """ Unexpected errors are reported without stopping delivery. """
+        delivery = ThreadedDelivery(
+            workers=1,
+            backend='newsletter.tests.test_connections.BrokenEmailBackend'
+        )
+
+        report = delivery.deliver(self.messages)
+
+        self.assertEqual(len(report.failed), 5)
+        self.assertFalse(report.pending)
+        self.assert_(isinstance(report.failed[0][1], ValueError))
+
+    def test_deliver_after_stop(self):
+        """ Stopping only affects the delivery run at hand. """
+        delivery = ThreadedDelivery(workers=2)
+        delivery.stop()
+
+        report = delivery.deliver(self.messages)
+
+        self.assertEqual(report.sent, self.messages)
+
+
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        self.subscription = Subscription.objects.create(
+            newsletter=n, email='test@test.com'
+        )
+
+    def queue(self, action='subscribe', **kwargs):
+        return ActivationEmail.objects.create(
+            subscription=self.subscription, action=action, **kwargs
+        )
+
+    def test_render_error(self):
+        """ E-mails failing to render do not stop the others. """
+        broken = self.queue(action='unknown')
+        email = self.queue()
+
+        ActivationEmail.send_queue()
+
+        self.assertEqual(len(mail.outbox), 1)
+
+        broken = ActivationEmail.objects.get(pk=broken.pk)
+        self.assertFalse(broken.sent)
+        self.assertEqual(broken.attempts, 1)
+        self.assert_(broken.last_error)
+        self.assertFalse(broken.claim_date)
+
+        email = ActivationEmail.objects.get(pk=email.pk)
+        self.assert_(email.sent)
+        self.assertFalse(email.claim_key)
+
+    def test_claimed(self):
+        """ E-mails claimed by another run are only sent when stale. """
+        self.queue(claim_key='other', claim_date=now())
+        stale = self.queue(
+            claim_key='other', claim_date=now() - timedelta(days=1)
+        )
+
+        ActivationEmail.send_queue()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            list(ActivationEmail.objects.filter(
+                sent=True
+            ).values_list('pk', flat=True)),
+            [stale.pk]
+        )
+
+    def test_claim_sent(self):
+        """ E-mails sent by another run after selecting are not claimed. """
+        email = self.queue()
+
+        # Another run sends the e-mail in between selecting and claiming,
+        # releasing its claim.
+        ActivationEmail.objects.filter(pk=email.pk).update(
+            sent=True, send_date=now(), attempts=1,
+            claim_key='', claim_date=None
+        )
+
+        self.assertEqual(ActivationEmail.claim_batch([email.pk]), [])
+
+    def test_claim_exhausted(self):
+        """ E-mails without attempts left are not claimed. """
+        email = self.queue(
+            attempts=newsletter_settings.OUTBOX_MAX_ATTEMPTS
+        )
+
+        self.assertEqual(ActivationEmail.claim_batch([email.pk]), [])
@@ -0,0 +1,573 @@
+import os
+import shutil
+import tempfile
+
+from datetime import timedelta
+
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+
+from django.core.files.base import ContentFile
+
+from django.db import transaction, IntegrityError
+from django.db.models.signals import pre_delete
+
+from django.test import TestCase, TransactionTestCase
+
+from django.utils.timezone import now
+
+from ..addressimport import ldif
+from ..addressimport.bloom import BloomFilter
+from ..admin_forms import (
+    SubscriptionAdminForm, get_subscribed_filter, make_subscription,
+    make_subscriptions, validate_entries, parse_csv, parse_ldif,
+    process_imports, AddressCollector,
+    NEW, EXISTING, DUPLICATE, NAME_TOO_LONG, EMAIL_TOO_LONG, INVALID_EMAIL
+)
+from ..addressimport.csv_util import CHARSET_SAMPLE_SIZE
+from ..jobs.daily import clean_imports
+from ..models import (
+    Newsletter, Subscription, AddressImport, StagedAddress
+)
+
+
+class BloomFilterTestCase(TestCase):
+    def test_membership(self):
+        """ Added values are always members, others mostly not. """
+        bloom = BloomFilter(1000)
+
+        added = [u'test%d@test.com' % x for x in range(1000)]
+        bloom.update(added)
+
+        self.assertEqual(len(bloom), 1000)
+
+        for value in added:
+            self.assert_(value in bloom)
+
+        false_positives = sum(
+            1 for x in range(1000) if u'other%d@test.com' % x in bloom
+        )
+        self.assert_(false_positives < 50)
+
+
+class ImportTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        Subscription.objects.create(
+            newsletter=self.n, email='Test@Test.com', subscribed=True
+        )
+
+    def test_unique_normalized(self):
+        """ Addresses differing only in case cannot be subscribed twice. """
+        with transaction.atomic():
+            self.assertRaises(
+                IntegrityError, Subscription.objects.create,
+                newsletter=self.n, email=' test@test.COM'
+            )
+
+    def test_admin_form_unique_normalized(self):
+        """ The admin refuses addresses differing only in case. """
+        form = SubscriptionAdminForm({
+            'newsletter': self.n.pk, 'email_field': 'TEST@test.com'
+        })
+
+        self.assertFalse(form.is_valid())
+
+        # Saving the existing subscription itself is fine
+        form = SubscriptionAdminForm({
+            'newsletter': self.n.pk, 'email_field': 'TEST@test.com',
+            'subscribed': True
+        }, instance=Subscription.objects.get(newsletter=self.n))
+
+        self.assert_(form.is_valid())
+
+    def test_make_subscription_filtered(self):
+        """ Addresses missing from the filter need no query. """
+        subscribed = get_subscribed_filter(self.n)
+
+        with self.assertNumQueries(0):
+            addr = make_subscription(
+                self.n, 'new@test.com', 'New', subscribed
+            )
+
+        self.assertEqual(addr.email_normalized, 'new@test.com')
+        self.assertFalse(addr.pk)
+
+        self.assertEqual(
+            make_subscription(self.n, 'test@TEST.com', None, subscribed),
+            None
+        )
+
+    def test_make_subscriptions(self):
+        """ Entries are classified using a single query. """
+        entries = [
+            ('new@test.com', 'New'),
+            ('TEST@test.com', 'Existing'),
+            ('New@Test.com', 'Duplicate')
+        ]
+
+        with self.assertNumQueries(1):
+            results = make_subscriptions(self.n, entries)
+
+        self.assertEqual(
+            [status for status, addr in results], [NEW, EXISTING, DUPLICATE]
+        )
+        self.assertEqual(results[0][1].name, 'New')
+        self.assertEqual(results[1][1], None)
+        self.assertEqual(results[2][1].email_normalized, 'new@test.com')
+
+    def test_bulk_import(self):
+        """ New subscriptions are inserted, others skipped or conflicted. """
+        Subscription.objects.create(newsletter=self.n, email='old@test.com')
+
+        entries = [
+            ('new@test.com', 'New'),
+            ('old@test.com', 'Old'),
+        ]
+        addresses = [
+            addr for status, addr in make_subscriptions(self.n, entries)
+        ]
+        # Subscribed to after the address file was parsed
+        addresses.append(
+            Subscription(newsletter=self.n, email='test@test.com')
+        )
+
+        summary = Subscription.objects.bulk_import(addresses)
+
+        self.assertEqual(
+            summary, {'inserted': 1, 'skipped': 1, 'conflicted': 1}
+        )
+
+        subscription = Subscription.objects.get(email_field='new@test.com')
+        self.assert_(subscription.subscribed)
+        self.assert_(subscription.subscribe_date)
+        self.assertFalse(subscription.activation_code)
+
+        n = Newsletter.objects.get(pk=self.n.pk)
+        self.assertEqual(n.subscribed_count, 2)
+        self.assertEqual(n.pending_count, 1)
+
+    def test_address_import(self):
+        """ Staged addresses are subscribed on confirmation. """
+        addresses = [
+            make_subscription(self.n, 'new%d@test.com' % x, 'New %d' % x)
+            for x in range(3)
+        ]
+
+        address_import = AddressImport.objects.create(newsletter=self.n)
+        address_import.stage(addresses)
+
+        self.assertEqual(address_import.addresses.count(), 3)
+
+        summary = address_import.confirm()
+
+        self.assertEqual(summary['inserted'], 3)
+        self.assertEqual(
+            Subscription.objects.filter(
+                newsletter=self.n, subscribed=True, name_field='New 1'
+            ).count(), 1
+        )
+        self.assertFalse(AddressImport.objects.exists())
+        self.assertFalse(StagedAddress.objects.exists())
+
+
+class ValidationTestCase(TestCase):
+    limits = {'name_field': 10, 'email_field': 21}
+
+    entries = [
+        ('valid@test.com', 'Valid'),
+        ('valid@test.com', 'Much too long'),
+        ('much.too.long@test.com', 'Valid'),
+        ('invalid', None),
+    ]
+
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+    def test_validate_entries(self):
+        """ Errors are reported per entry, in order. """
+        results = validate_entries(self.entries, limits=self.limits)
+
+        self.assertEqual(
+            [error for email, email_normalized, name, error in results],
+            [None, NAME_TOO_LONG, EMAIL_TOO_LONG, INVALID_EMAIL]
+        )
+
+    def test_validate_entries_ignore_errors(self):
+        """ When ignoring errors, too long values are truncated. """
+        self.assertEqual(
+            validate_entries(self.entries, True, self.limits)[1:3],
+            [
+                ('valid@test.com', 'valid@test.com', 'Much too l', None),
+                ('much.too.long@test.co', 'much.too.long@test.co', 'Valid',
+                 None)
+            ]
+        )
+
+    def test_validate_entries_normalize(self):
+        """ Valid e-mail addresses are normalized. """
+        self.assertEqual(
+            validate_entries(
+                [('Valid@TEST.com', None), ('Invalid', None)],
+                limits=self.limits
+            ),
+            [
+                ('Valid@TEST.com', 'valid@test.com', None, None),
+                ('Invalid', None, None, INVALID_EMAIL)
+            ]
+        )
+
+
+class ParallelValidationTestCase(TransactionTestCase):
+    """
+    Validation in processes, which is not used within the transaction of
+    a TestCase.
+    """
+
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+    def test_parallel(self):
+        """ Validating in processes gives the same results, in order. """
+        collector = AddressCollector(
+            self.n, True, batch_size=4, processes=2, chunk_size=3
+        )
+
+        for x in range(10):
+            collector.add('test%d@test.com' % x, 'Test %d' % x, x + 1)
+            collector.add('invalid%d' % x, 'Invalid %d' % x, x + 1)
+
+        self.assertNotEqual(collector.pool, None)
+
+        collector.finish()
+
+        self.assertEqual(collector.pool, None)
+        self.assertEqual(collector.rows_read, 20)
+        self.assertEqual(collector.valid, 10)
+        self.assertEqual(collector.errors, 10)
+        self.assertEqual(
+            collector.addresses['test9@test.com'].name, 'Test 9'
+        )
+
+    def test_parallel_errors(self):
+        """ Errors are reported for the right row. """
+        collector = AddressCollector(
+            self.n, batch_size=4, processes=2, chunk_size=3
+        )
+
+        try:
+            for x in range(10):
+                collector.add('test%d@test.com' % x, 'Test %d' % x, x + 1)
+            collector.add('invalid', 'Invalid', 11)
+
+            self.assertRaises(ValidationError, collector.finish)
+        finally:
+            collector.close()
+
+        self.assertEqual(collector.pool, None)
+        self.assertEqual(collector.valid, 8)
+        self.assertEqual(collector.errors, 0)
+
+    def test_parallel_transaction(self):
+        """ Within transactions, entries are validated in process. """
+        collector = AddressCollector(
+            self.n, True, batch_size=4, processes=2, chunk_size=3
+        )
+
+        with transaction.atomic():
+            for x in range(10):
+                collector.add('test%d@test.com' % x, 'Test %d' % x, x + 1)
+
+            self.assertEqual(collector.pool, None)
+
+            collector.finish()
+
+        self.assertEqual(collector.valid, 10)
+
+
+class ImportJobTestCase(TestCase):
+    csv = (
+        'name,email\n'
+        'New,new@test.com\n'
+        'Existing,existing@test.com\n'
+        'New again,NEW@test.com\n'
+        'Invalid,invalid\n'
+    )
+
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        Subscription.objects.create(
+            newsletter=self.n, email='existing@test.com', subscribed=True
+        )
+
+        self.import_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.import_root)
+
+    def process(self, ignore_errors):
+        with self.settings(NEWSLETTER_IMPORT_ROOT=self.import_root):
+            address_import = AddressImport(
+                newsletter=self.n, ignore_errors=ignore_errors
+            )
+            address_import.address_file.save(
+                'addresses.csv', ContentFile(self.csv)
+            )
+
+            process_imports()
+
+        return AddressImport.objects.get(pk=address_import.pk)
+
+    def test_private_storage(self):
+        """ Files are stored privately, under a random name. """
+        with self.settings(NEWSLETTER_IMPORT_ROOT=self.import_root):
+            address_import = AddressImport(newsletter=self.n)
+            address_import.address_file.save(
+                'addresses.csv', ContentFile(self.csv)
+            )
+
+            path = address_import.address_file.path
+
+            self.assertNotEqual(
+                os.path.basename(path), 'addresses.csv'
+            )
+            self.assert_(path.endswith('.csv'))
+            self.assertEqual(os.path.dirname(path), self.import_root)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+            self.assertRaises(
+                ValueError, lambda: address_import.address_file.url
+            )
+
+    def test_interrupted(self):
+        """ Imports which stopped making progress are failed. """
+        address_import = AddressImport.objects.create(
+            newsletter=self.n, status=AddressImport.RUNNING,
+            claim_date=now() - timedelta(days=1)
+        )
+        address_import.stage([make_subscription(self.n, 'new@test.com')])
+
+        running = AddressImport.objects.create(
+            newsletter=self.n, status=AddressImport.RUNNING,
+            claim_date=now()
+        )
+
+        process_imports()
+
+        address_import = AddressImport.objects.get(pk=address_import.pk)
+        self.assertEqual(address_import.status, AddressImport.FAILED)
+        self.assert_(address_import.error_message)
+        self.assertFalse(address_import.addresses.exists())
+
+        self.assertEqual(
+            AddressImport.objects.get(pk=running.pk).status,
+            AddressImport.RUNNING
+        )
+
+    def test_clean_running(self):
+        """ Running imports are not cleaned up. """
+        AddressImport.objects.create(
+            newsletter=self.n, status=AddressImport.RUNNING,
+            create_date=now() - timedelta(days=2)
+        )
+        AddressImport.objects.create(
+            newsletter=self.n, status=AddressImport.FAILED,
+            create_date=now() - timedelta(days=2)
+        )
+
+        clean_imports.Job().execute()
+
+        self.assertEqual(
+            list(AddressImport.objects.values_list('status', flat=True)),
+            [AddressImport.RUNNING]
+        )
+
+    def test_process(self):
+        """ Progress is reported and valid addresses are staged. """
+        address_import = self.process(ignore_errors=True)
+
+        self.assertEqual(address_import.status, AddressImport.FINISHED)
+        self.assertEqual(address_import.get_progress(), {
+            'status': AddressImport.FINISHED,
+            'error_message': '',
+            'rows_read': 4,
+            'valid': 1,
+            'duplicates': 2,
+            'errors': 1
+        })
+
+        self.assertEqual(
+            list(address_import.addresses.values_list('email', 'name')),
+            [('new@test.com', 'New')]
+        )
+
+    def test_process_final_progress(self):
+        """ Progress is saved when the last entries are not resolved. """
+        # The invalid last entry is validated on its own
+        with self.settings(
+                NEWSLETTER_IMPORT_CHUNK_SIZE=1,
+                NEWSLETTER_BULK_BATCH_SIZE=1):
+            address_import = self.process(ignore_errors=True)
+
+        self.assertEqual(address_import.rows_read, 4)
+        self.assertEqual(address_import.errors, 1)
+
+    def test_confirm_rollback(self):
+        """ Files of imports failing to be confirmed are kept. """
+        with self.settings(NEWSLETTER_IMPORT_ROOT=self.import_root):
+            address_import = AddressImport(newsletter=self.n)
+            address_import.address_file.save(
+                'addresses.csv', ContentFile(self.csv)
+            )
+            address_import.stage([make_subscription(self.n, 'new@test.com')])
+
+            path = address_import.address_file.path
+
+            def fail(**kwargs):
+                raise ValueError('Unable to delete')
+
+            pre_delete.connect(fail, sender=AddressImport)
+            try:
+                self.assertRaises(ValueError, address_import.confirm)
+            finally:
+                pre_delete.disconnect(fail, sender=AddressImport)
+
+            self.assert_(os.path.exists(path))
+            self.assert_(
+                AddressImport.objects.filter(pk=address_import.pk).exists()
+            )
+
+            address_import.confirm()
+
+            self.assertFalse(os.path.exists(path))
+
+    def test_process_errors(self):
+        """ Without ignoring errors, the import fails. """
+        address_import = self.process(ignore_errors=False)
+
+        self.assertEqual(address_import.status, AddressImport.FAILED)
+        self.assert_(address_import.error_message)
+        self.assertFalse(address_import.addresses.exists())
+
+
+class CSVImportTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+    def test_utf16(self):
+        """ Files in encodings which are not ASCII compatible are read. """
+        content = u'name;email\nJos\xe9;jose@test.com\n'.encode('utf-16')
+
+        addresses = parse_csv(BytesIO(content), self.n)
+
+        self.assertEqual(addresses['jose@test.com'].name, u'Jos\xe9')
+
+    def test_charset_sample(self):
+        """ Characters beyond the charset sample are read. """
+        rows = [b'name,email\n']
+        rows.extend(
+            b'Test %d,test%d@test.com\n' % (x, x)
+            for x in range(CHARSET_SAMPLE_SIZE // 20)
+        )
+        rows.append(u'Jos\xe9,jose@test.com\n'.encode('latin-1'))
+
+        addresses = parse_csv(BytesIO(b''.join(rows)), self.n)
+
+        self.assertEqual(addresses['jose@test.com'].name, u'Jos\xe9')
+        self.assertEqual(len(addresses), len(rows) - 1)
+
+
+class LDIFTestCase(TestCase):
+    data = (
+        'version: 1\r\n'
+        '# A comment\r\n'
+        'dn: cn=Test User,dc=example,dc=com\r\n'
+        'cn: Test User\r\n'
+        'mail: test@example.com\r\n'
+        'description: A folded\r\n'
+        '  description\r\n'
+        '\r\n'
+        'dn:: Y249Sm9zXHhlOSxkYz1leGFtcGxlLGRjPWNvbQ==\r\n'
+        'cn:: Sm9zw6k=\r\n'
+        'mail: jose@example.com\r\n'
+        'mail: jose@example.org\r\n'
+        '\r\n'
+        '\r\n'
+        'dn: cn=No Mail,dc=example,dc=com\r\n'
+        'cn: No Mail\r\n'
+    )
+
+    def parse(self, parser_class, **kwargs):
+        records = []
+
+        class Parser(parser_class):
+            def handle(self, dn, entry):
+                records.append((dn, entry))
+
+        Parser(BytesIO(self.data), **kwargs).parse()
+
+        return records
+
+    def test_fast_parser(self):
+        """ Records are the same as those of LDIFParser. """
+        records = self.parse(ldif.LDIFParser)
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(
+            records[0][1]['description'], ['A folded description']
+        )
+
+        for buffer_size in (7, 1024):
+            self.assertEqual(
+                self.parse(ldif.FastLDIFParser, buffer_size=buffer_size),
+                records
+            )
+
+    def test_fast_parser_attr_types(self):
+        """ Only requested attributes are read. """
+        records = self.parse(ldif.FastLDIFParser, attr_types=('mail', ))
+
+        self.assertEqual([entry for dn, entry in records], [
+            {'mail': ['test@example.com']},
+            {'mail': ['jose@example.com', 'jose@example.org']},
+            {}
+        ])
+
+    def test_fast_parser_invalid_dn(self):
+        """ DN's are only validated when reading all attributes. """
+        self.data = 'dn: invalid\nmail: test@example.com\n'
+
+        self.assertRaises(ValueError, self.parse, ldif.FastLDIFParser)
+        self.assertEqual(
+            len(self.parse(ldif.FastLDIFParser, attr_types=('mail', ))), 1
+        )
+
+    def test_parse_ldif(self):
+        """ Entries without e-mail address are skipped. """
+        n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        addresses = parse_ldif(BytesIO(self.data), n, ignore_errors=True)
+
+        self.assertEqual(
+            sorted(addresses), ['jose@example.com', 'test@example.com']
+        )
+        self.assertEqual(addresses['jose@example.com'].name, 'Jos\xc3\xa9')
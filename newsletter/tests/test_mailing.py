@@ -4,11 +4,15 @@ from datetime import timedelta
 
 from django.core import mail
 
+from django.test import TestCase
+from django.test.utils import override_settings
+
 from django.utils import unittest
 from django.utils.timezone import now
 
 from ..models import (
-    Newsletter, Subscription, Submission, Message, Article, get_default_sites
+    Newsletter, Subscription, Submission, Message, Article, get_default_sites,
+    _template_cache
 )
 from ..utils import ACTIONS
 
@@ -224,7 +228,7 @@ class SubscriptionTestCase(UserTestCase, MailingTestCase):
 
         self.ns = Subscription(
             name='Test susbcriber', newsletter=self.n,
-            email='test@test.com'
+            email='other@test.com'
         )
         self.ns.save()
 
@@ -432,3 +436,42 @@ class TemplateOverridesTestCase(MailingTestCase, AllEmailsTestsMixin):
         self.assertEmailAlternativeBodyContains(
             'override for %s.html' % action
         )
+
+
+class TemplateCacheTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+        self.n.save()
+
+    def test_cached(self):
+        """ Resolved templates are reused. """
+        templates = self.n.get_templates('subscribe')
+
+        self.assertIn(('test-newsletter', 'subscribe', True), _template_cache)
+        self.assertIs(self.n.get_templates('subscribe'), templates)
+
+    def test_invalidate_on_save(self):
+        """ Saving a newsletter invalidates resolved templates. """
+        templates = self.n.get_templates('subscribe')
+
+        self.n.save()
+
+        self.assertFalse(_template_cache)
+        self.assertIsNot(self.n.get_templates('subscribe'), templates)
+
+    @override_settings(DEBUG=True)
+    def test_debug(self):
+        """ Templates are not cached in DEBUG mode. """
+        self.n.get_templates('subscribe')
+
+        self.assertFalse(_template_cache)
+
+    def test_warm(self):
+        """ Warming the cache resolves templates for all actions. """
+        Newsletter.warm_template_cache()
+
+        for action in ACTIONS + ('message', ):
+            self.assertIn(('test-newsletter', action, True), _template_cache)
@@ -0,0 +1,192 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from .. import cache as status_cache
+from ..models import Newsletter, Subscription
+
+
+class SaveTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        self.s = Subscription.objects.create(
+            newsletter=self.n, email='test@test.com'
+        )
+
+    def test_save_queries(self):
+        """ Saving a loaded subscription does not re-fetch its state. """
+        s = Subscription.objects.get(pk=self.s.pk)
+        s.subscribed = True
+
+        # One query for the subscription, one for the newsletter counters
+        with self.assertNumQueries(2):
+            s.save()
+
+        self.assert_(s.subscribe_date)
+        self.assertFalse(s.unsubscribed)
+
+    def test_deferred(self):
+        """ Deferred fields are not loaded to remember their state. """
+        with self.assertNumQueries(1):
+            subscriptions = list(
+                Subscription.objects.only('pk', 'email_field')
+            )
+
+        self.assertEqual(len(subscriptions), 1)
+
+    def test_save_deferred(self):
+        """ Saving detects transitions of deferred subscriptions. """
+        s = Subscription.objects.defer('subscribed', 'unsubscribed').get(
+            pk=self.s.pk
+        )
+        s.subscribed = True
+        s.save()
+
+        s = Subscription.objects.get(pk=self.s.pk)
+        self.assert_(s.subscribed)
+        self.assert_(s.subscribe_date)
+
+        n = Newsletter.objects.get(pk=self.n.pk)
+        self.assertEqual((n.subscribed_count, n.pending_count), (1, 0))
+
+
+class CountersTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        self.ss = [
+            Subscription.objects.create(
+                newsletter=self.n, email='test%d@test.com' % x
+            ) for x in range(2)
+        ]
+
+    def assertCounters(self, subscribed, unsubscribed, pending):
+        n = Newsletter.objects.get(pk=self.n.pk)
+
+        self.assertEqual(
+            (n.subscribed_count, n.unsubscribed_count, n.pending_count),
+            (subscribed, unsubscribed, pending)
+        )
+
+    def test_create(self):
+        """ New subscriptions are counted as pending. """
+        self.assertCounters(0, 0, 2)
+
+    def test_subscribe_unsubscribe(self):
+        """ Subscriber counters follow subscription state. """
+        s = self.ss[0]
+
+        s.update('subscribe')
+        self.assertCounters(1, 0, 1)
+
+        s.update('unsubscribe')
+        self.assertCounters(0, 1, 1)
+
+        s.update('subscribe')
+        self.assertCounters(1, 0, 1)
+
+    def test_delete(self):
+        """ Deleted subscriptions are no longer counted. """
+        self.ss[0].update('subscribe')
+
+        self.ss[0].delete()
+        self.assertCounters(0, 0, 1)
+
+        self.ss[1].delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_bulk_transition(self):
+        """ Bulk transitions move subscriptions between counters. """
+        self.ss[0].update('subscribe')
+
+        Subscription.objects.bulk_transition(
+            self.n.subscription_set.all(), 'subscribe'
+        )
+        self.assertCounters(2, 0, 0)
+
+        Subscription.objects.bulk_transition(
+            self.n.subscription_set.all(), 'unsubscribe'
+        )
+        self.assertCounters(0, 2, 0)
+
+    def test_reconcile(self):
+        """ Drift is repaired by reconciliation. """
+        Newsletter.objects.filter(pk=self.n.pk).update(subscribed_count=42)
+
+        self.n.reconcile_counters()
+        self.assertCounters(0, 0, 2)
+
+
+class BulkTransitionTestCase(TestCase):
+    def setUp(self):
+        self.n = Newsletter.objects.create(
+            title='Test newsletter', slug='test-newsletter',
+            sender='Test Sender', email='test@testsender.com'
+        )
+
+        self.pks = [
+            Subscription.objects.create(
+                newsletter=self.n, email='test%d@test.com' % x
+            ).pk for x in range(2)
+        ]
+
+    def get_subscriptions(self):
+        return Subscription.objects.filter(pk__in=self.pks)
+
+    def test_bulk_transition(self):
+        """ Bulk transitions maintain state like save() does. """
+        self.assertEqual(
+            Subscription.objects.bulk_transition(
+                self.get_subscriptions(), 'subscribe'
+            ), 2
+        )
+
+        for s in self.get_subscriptions():
+            self.assert_(s.subscribed)
+            self.assert_(s.subscribe_date)
+            self.assertFalse(s.unsubscribed)
+
+        # Subscriptions which are already subscribed are left alone
+        self.assertEqual(
+            Subscription.objects.bulk_transition(
+                self.get_subscriptions(), 'subscribe'
+            ), 0
+        )
+
+        self.assertEqual(
+            Subscription.objects.bulk_transition(
+                self.get_subscriptions(), 'unsubscribe'
+            ), 2
+        )
+
+        for s in self.get_subscriptions():
+            self.assertFalse(s.subscribed)
+            self.assert_(s.unsubscribed)
+            self.assert_(s.unsubscribe_date)
+
+    @override_settings(NEWSLETTER_STATUS_CACHE='default')
+    def test_invalidate(self):
+        """ Cached states of transitioned subscriptions are forgotten. """
+        status_cache.get_cache().clear()
+
+        Subscription.objects.bulk_transition(
+            self.get_subscriptions(), 'subscribe'
+        )
+
+        for s in self.get_subscriptions():
+            status_cache.set_subscription_state(self.n.pk, s.email, s)
+
+        Subscription.objects.bulk_transition(
+            self.get_subscriptions(), 'unsubscribe'
+        )
+
+        for s in self.get_subscriptions():
+            self.assertEqual(
+                status_cache.get_subscription_state(self.n.pk, s.email), None
+            )
@@ -22,9 +22,11 @@ from django.utils import unittest, timezone
 from django.test.utils import override_settings
 
 from ..models import (
-    Newsletter, Subscription, Submission, Message, get_default_sites
+    Newsletter, Subscription, Submission, Message, ActivationEmail,
+    get_default_sites
 )
 
+from .. import cache as status_cache
 from ..forms import UpdateForm
 
 from ..utils import get_user_model
@@ -581,6 +583,47 @@ class AnonymousSubscribeTestCase(
 
         self.assertEmailContains(full_activate_url)
 
+    @override_settings(
+        NEWSLETTER_CONFIRM_EMAIL_SUBSCRIBE=True,
+        NEWSLETTER_ACTIVATION_OUTBOX=True
+    )
+    def test_subscribe_request_post_outbox(self):
+        """ Post the subscription form with the activation outbox. """
+
+        response = self.client.post(
+            self.subscribe_url, {
+                'name_field': 'Test Name',
+                'email_field': 'test@email.com'
+            }
+        )
+
+        self.assertRedirects(response, self.subscribe_email_sent_url)
+
+        subscription = self.get_only_subscription(
+            email_field__exact='test@email.com'
+        )
+
+        # The activation email is queued rather than sent
+        self.assertEquals(len(mail.outbox), 0)
+        self.assertEquals(
+            subscription.activationemail_set.filter(
+                action='subscribe', sent=False
+            ).count(), 1
+        )
+
+        ActivationEmail.send_queue()
+
+        self.assertEquals(len(mail.outbox), 1)
+
+        activate_url = subscription.subscribe_activate_url()
+        full_activate_url = 'http://%s%s' % (self.site.domain, activate_url)
+
+        self.assertEmailContains(full_activate_url)
+
+        self.assertFalse(
+            subscription.activationemail_set.filter(sent=False).exists()
+        )
+
     @override_settings(NEWSLETTER_CONFIRM_EMAIL_SUBSCRIBE=False)
     def test_subscribe_request_post_no_email(self):
         """
@@ -685,6 +728,115 @@ class AnonymousSubscribeTestCase(
         self.assertContains(response, "already been subscribed to",
                             status_code=200)
 
+    def test_subscribe_twice_case(self):
+        """ E-mail addresses differing only in case are the same. """
+
+        subscription = Subscription(newsletter=self.n,
+                                    name='Test Name',
+                                    email='Test@Email.com',
+                                    subscribed=True)
+        subscription.save()
+
+        self.assertEquals(subscription.email_normalized, 'test@email.com')
+
+        response = self.client.post(
+            self.subscribe_url, {
+                'name_field': 'Test Name',
+                'email_field': 'test@email.com'
+            }
+        )
+
+        self.assertContains(response, "already been subscribed to",
+                            status_code=200)
+
+    @override_settings(NEWSLETTER_STATUS_CACHE='default')
+    def test_subscribe_twice_cached(self):
+        """ Cached subscription states are invalidated on changes. """
+
+        status_cache.get_cache().clear()
+
+        subscription = Subscription(newsletter=self.n,
+                                    name='Test Name',
+                                    email='test@email.com',
+                                    subscribed=True)
+        subscription.save()
+
+        data = {
+            'name_field': 'Test Name',
+            'email_field': 'test@email.com'
+        }
+
+        response = self.client.post(self.subscribe_url, data)
+        self.assertContains(response, "already been subscribed to",
+                            status_code=200)
+
+        self.assertEquals(
+            status_cache.get_subscription_state(self.n.pk, 'test@email.com'),
+            status_cache.SUBSCRIBED
+        )
+
+        # Changing the subscription clears the cached state
+        subscription.subscribed = False
+        subscription.save()
+
+        self.assertEquals(
+            status_cache.get_subscription_state(self.n.pk, 'test@email.com'),
+            None
+        )
+
+        response = self.client.post(self.subscribe_url, data)
+        self.assertNotContains(response, "already been subscribed to",
+                               status_code=302)
+
+    @override_settings(NEWSLETTER_STATUS_CACHE='default')
+    def test_subscribe_pending_cached(self):
+        """ Addresses which are not subscribed are not cached. """
+
+        status_cache.get_cache().clear()
+
+        data = {
+            'name_field': 'Test Name',
+            'email_field': 'test@email.com'
+        }
+
+        for x in range(2):
+            response = self.client.post(self.subscribe_url, data)
+            self.assertRedirects(response, self.subscribe_email_sent_url)
+
+            self.assertEquals(
+                status_cache.get_subscription_state(
+                    self.n.pk, 'test@email.com'
+                ), None
+            )
+
+        self.get_only_subscription(email_field__exact='test@email.com')
+
+    @override_settings(NEWSLETTER_STATUS_CACHE='default')
+    def test_user_cached(self):
+        """ Cached registered user lookups are invalidated on changes. """
+
+        status_cache.get_cache().clear()
+
+        # Addresses without a user are not cached
+        status_cache.set_registered_user('test@email.com', '')
+        self.assertEquals(
+            status_cache.get_registered_user('test@email.com'), None
+        )
+
+        user = User.objects.create_user('john', 'test@email.com')
+        status_cache.set_registered_user('test@email.com', 'john')
+
+        # Both the former and the new address are invalidated
+        user.email = 'other@email.com'
+        user.save()
+
+        self.assertEquals(
+            status_cache.get_registered_user('test@email.com'), None
+        )
+        self.assertEquals(
+            status_cache.get_registered_user('other@email.com'), None
+        )
+
     def test_subscribe_unsubscribed(self):
         """
         After having been unsubscribed, a user should be able to subscribe
@@ -706,7 +858,8 @@ class AnonymousSubscribeTestCase(
             {
                 'name_field': subscription.name,
                 'email_field': subscription.email,
-                'user_activation_code': subscription.activation_code
+                'user_activation_code':
+                    subscription.make_activation_token('unsubscribe')
             }
         )
 
@@ -741,7 +894,8 @@ class AnonymousSubscribeTestCase(
             {
                 'name_field': subscription.name,
                 'email_field': subscription.email,
-                'user_activation_code': subscription.activation_code
+                'user_activation_code':
+                    subscription.make_activation_token('subscribe')
             }
         )
 
@@ -793,18 +947,24 @@ class AnonymousSubscribeTestCase(
 
         self.assertFalse(subscription.subscribed)
 
+        # Activation links carry signed tokens, so no code is stored
+        self.assertFalse(subscription.activation_code)
+
         activate_url = subscription.subscribe_activate_url()
         self.assert_(activate_url)
 
         response = self.client.get(activate_url)
         self.assertInContext(response, 'form', UpdateForm)
-        self.assertContains(response, subscription.activation_code)
+
+        # The activation token from the URL is filled in
+        self.assertContains(response, activate_url.split('/')[-2])
 
         response = self.client.post(
             activate_url, {
                 'name_field': 'Test Name',
                 'email_field': 'test@email.com',
-                'user_activation_code': subscription.activation_code
+                'user_activation_code':
+                    subscription.make_activation_token('subscribe')
             }
         )
 
@@ -821,6 +981,58 @@ class AnonymousSubscribeTestCase(
         dt = (subscription.subscribe_date - subscription.create_date).seconds
         self.assertBetween(dt, WAIT_TIME, WAIT_TIME + 1)
 
+    def test_subscribe_request_activate_token(self):
+        """ Activation tokens are only valid for their own action. """
+
+        subscription = Subscription(newsletter=self.n,
+                                    name='Test Name',
+                                    email='test@email.com')
+        subscription.save()
+
+        activate_url = subscription.subscribe_activate_url()
+
+        response = self.client.post(
+            activate_url, {
+                'name_field': 'Test Name',
+                'email_field': 'test@email.com',
+                'user_activation_code':
+                    subscription.make_activation_token('unsubscribe')
+            }
+        )
+
+        self.assertContains(response, 'does not match', status_code=200)
+
+        response = self.client.post(
+            activate_url, {
+                'name_field': 'Test Name',
+                'email_field': 'test@email.com',
+                'user_activation_code':
+                    subscription.make_activation_token('subscribe')
+            }
+        )
+
+        self.assertRedirects(response, self.subscribe_activated_url)
+
+    @override_settings(NEWSLETTER_LEGACY_ACTIVATION_CODES=False)
+    def test_subscribe_activate_legacy_code(self):
+        """ Stored activation codes can be switched off. """
+
+        subscription = Subscription(newsletter=self.n,
+                                    name='Test Name',
+                                    email='test@email.com',
+                                    activation_code='legacy')
+        subscription.save()
+
+        response = self.client.post(
+            subscription.subscribe_activate_url(), {
+                'name_field': 'Test Name',
+                'email_field': 'test@email.com',
+                'user_activation_code': 'legacy'
+            }
+        )
+
+        self.assertContains(response, 'does not match', status_code=200)
+
     @override_settings(NEWSLETTER_CONFIRM_EMAIL_UNSUBSCRIBE=True)
     def test_unsubscribe_request_post(self):
         """ Post the unsubscribe request form. """
@@ -926,14 +1138,17 @@ class AnonymousSubscribeTestCase(
 
         response = self.client.get(activate_url)
         self.assertInContext(response, 'form', UpdateForm)
-        self.assertContains(response, subscription.activation_code)
+
+        # The activation token from the URL is filled in
+        self.assertContains(response, activate_url.split('/')[-2])
 
         testname2 = 'Test Name2'
         testemail2 = 'test2@email.com'
         response = self.client.post(activate_url, {
             'name_field': testname2,
             'email_field': testemail2,
-            'user_activation_code': subscription.activation_code
+            'user_activation_code':
+                subscription.make_activation_token('unsubscribe')
         })
 
         # Assure we are redirected to "unsubscribe activated" page.
@@ -1076,14 +1291,17 @@ class AnonymousSubscribeTestCase(
 
         response = self.client.get(activate_url)
         self.assertInContext(response, 'form', UpdateForm)
-        self.assertContains(response, subscription.activation_code)
+
+        # The activation token from the URL is filled in
+        self.assertContains(response, activate_url.split('/')[-2])
 
         testname2 = 'Test Name2'
         testemail2 = 'test2@email.com'
         response = self.client.post(activate_url, {
             'name_field': testname2,
             'email_field': testemail2,
-            'user_activation_code': subscription.activation_code
+            'user_activation_code':
+                subscription.make_activation_token('update')
         })
 
         # Assure we are redirected to "update activated" page.
@@ -57,7 +57,8 @@ urlpatterns = patterns(
     # Action confirmation views
     surl(
         '^<newsletter_slug:s>/subscription/<email=[-_a-zA-Z0-9@\.\+~]+>/'
-        '<action=subscribe|update|unsubscribe>/activate/<activation_code:s>/$',
+        '<action=subscribe|update|unsubscribe>/activate/'
+        '<activation_code=[-_a-zA-Z0-9.]+>/$',
         UpdateSubscriptionViev.as_view(), name='newsletter_update_activate'
     ),
     surl(
@@ -3,20 +3,19 @@
 import logging
 logger = logging.getLogger(__name__)
 
-import random
+import time
 
-try:
-    from hashlib import sha1
-except ImportError:
-    from django.utils.hashcompat import sha_constructor as sha1
+from django.core import signing
+from django.utils import baseconv
 
 from django.contrib.sites.models import Site
 
-from datetime import datetime
-
 # Possible actions that user can perform
 ACTIONS = ('subscribe', 'unsubscribe', 'update')
 
+# Salt for signing activation tokens
+ACTIVATION_SALT = 'newsletter.activation'
+
 
 def get_user_model():
     """ get_user_model compatibility wrapper. Returns active User model. """
@@ -31,15 +30,62 @@ def get_user_model():
     return User
 
 
-def make_activation_code():
-    """ Generate a unique activation code. """
-    random_string = str(random.random())
-    random_digest = sha1(random_string).hexdigest()[:5]
-    time_string = str(datetime.now().microsecond)
+def normalize_email(email):
+    """
+    Return the normalized form of `email` used for case-insensitive
+    lookups of subscriptions.
+    """
+    if not email:
+        return None
+
+    return email.strip().lower()
+
+
+class ActivationSigner(signing.TimestampSigner):
+    """
+    Signer for activation tokens. Timestamps are rounded down to the hour,
+    so repeated activation e-mails carry identical links.
+    """
+
+    def __init__(self):
+        super(ActivationSigner, self).__init__(salt=ACTIVATION_SALT)
+
+    def timestamp(self):
+        return baseconv.base62.encode(int(time.time()) // 3600 * 3600)
 
-    combined_string = random_digest + time_string
 
-    return sha1(combined_string).hexdigest()
+def _activation_value(subscription_id, action, email):
+    """ Return the value signed in activation tokens. """
+    return '%s/%s/%s' % (subscription_id, action, normalize_email(email))
+
+
+def make_activation_token(subscription_id, action, email):
+    """
+    Generate a signed, timestamped activation token for `action` on a
+    subscription, which can be verified without a stored code.
+    """
+    value = _activation_value(subscription_id, action, email)
+    signed = ActivationSigner().sign(value)
+
+    # Strip the value itself; it is known when verifying. The separator
+    # between timestamp and signature is replaced by one which is not
+    # quoted in URL's.
+    return signed[len(value) + 1:].replace(':', '.')
+
+
+def check_activation_token(token, subscription_id, action, email,
+                           max_age=None):
+    """ Return whether `token` is valid, and not expired, for `action`. """
+    value = _activation_value(subscription_id, action, email)
+
+    try:
+        ActivationSigner().unsign(
+            '%s:%s' % (value, token.replace('.', ':')), max_age=max_age
+        )
+    except signing.BadSignature:
+        return False
+
+    return True
 
 
 def get_default_sites():
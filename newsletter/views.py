@@ -10,6 +10,10 @@ from smtplib import SMTPException
 from django.core.exceptions import ValidationError, ImproperlyConfigured
 from django.core.urlresolvers import reverse
 
+from django.db import transaction, IntegrityError
+
+from django.http import Http404
+
 from django.shortcuts import get_object_or_404, redirect
 
 from django.views.generic import (
@@ -404,6 +408,12 @@ class ActionRequestView(ActionFormView):
             # Confirmation email for this action was switched off in settings.
             return self.no_email_confirm(form)
 
+        if newsletter_settings.ACTIVATION_OUTBOX:
+            # Leave sending to the outbox job, keeping the request fast.
+            self.subscription.queue_activation_email(action=self.action)
+
+            return super(ActionRequestView, self).form_valid(form)
+
         try:
             self.subscription.send_activation_email(action=self.action)
 
@@ -436,7 +446,15 @@ class SubscribeRequestView(ActionRequestView):
         return kwargs
 
     def get_subscription(self, form):
-        return form.save()
+        try:
+            with transaction.atomic():
+                return form.save()
+
+        except IntegrityError:
+            # Subscribed to by a concurrent request after validation
+            return Subscription.objects.get_by_email(
+                form.instance.newsletter, form.instance.email
+            )
 
     def dispatch(self, request, *args, **kwargs):
         if request.user.is_authenticated():
@@ -479,16 +497,18 @@ class UpdateSubscriptionViev(ActionFormView):
     def process_url_data(self, *args, **kwargs):
         """
         Add email, subscription and activation_code
-        to instance attributes.
+        (a signed token or legacy code) to instance attributes.
         """
         assert 'email' in kwargs
 
         super(UpdateSubscriptionViev, self).process_url_data(*args, **kwargs)
 
-        self.subscription = get_object_or_404(
-            Subscription, newsletter=self.newsletter,
-            email_field__exact=kwargs['email']
-        )
+        try:
+            self.subscription = Subscription.objects.get_by_email(
+                self.newsletter, kwargs['email']
+            )
+        except Subscription.DoesNotExist:
+            raise Http404
         # activation_code is optional kwarg which defaults to None
         self.activation_code = kwargs.get('activation_code')
 
@@ -505,6 +525,7 @@ class UpdateSubscriptionViev(ActionFormView):
         kwargs = super(UpdateSubscriptionViev, self).get_form_kwargs()
 
         kwargs['instance'] = self.subscription
+        kwargs['action'] = self.action
 
         return kwargs
 